@@ -2,9 +2,26 @@ import pyos
 
 state = None
 app = None
+reader = None
+
+# Files larger than this are memory-mapped and only the visible rows are rendered.
+MAPPED_SIZE = 65536
+
+def closeReader():
+    global reader
+    if reader is not None:
+        reader.close()
+        reader = None
 
 def loadFile(path):
+    global reader
+    closeReader()
+    app.ui.clear_children()
     state.getGUI().displayStandbyText("Loading file")
+    if pyos.os.path.getsize(path) > MAPPED_SIZE:
+        reader = pyos.GUI.MappedTextScrollableContainer((0, 0), path, width=app.ui.width, height=app.ui.height)
+        app.ui.add_child(reader)
+        return
     f = open(path, "rU")
     contents = str(f.read())
     scroller = pyos.GUI.TextScrollableContainer((0, 0), width=app.ui.width, height=app.ui.height)
@@ -22,4 +39,7 @@ def onStart(s, a):
         app.file = None
     else:
         state.getApplicationList().getApp("files").getModule().FilePicker((10, 10), app, width=app.ui.width-20, height=app.ui.height-20,
-                                                                          onSelect=loadFile).display()
\ No newline at end of file
+                                                                          onSelect=loadFile).display()
+
+def onStop():
+    closeReader()
@@ -13,15 +13,15 @@ class Operations:
             return
         count = 0
         for src in srcList:
-            if src.isFile():
+            if pyos.os.path.isfile(src):
                 try:
-                    copy2(src.absolutePath, dstDir)
+                    copy2(src, dstDir)
                     count += 1
                 except:
                     pyos.GUI.ErrorDialog("Failed to copy a file.").display()
-            if src.isDir():
+            if pyos.os.path.isdir(src):
                 try:
-                    copytree(src.absolutePath, dstDir)
+                    copytree(src, dstDir)
                     count += 1
                 except:
                     pyos.GUI.ErrorDialog("Failed to copy a folder.").display()
@@ -34,16 +34,16 @@ class Operations:
             return
         count = 0
         for src in srcList:
-            if src.isFile():
+            if pyos.os.path.isfile(src):
                 try:
-                    move(src.absolutePath, dstDir)
+                    move(src, dstDir)
                     count += 1
                 except:
                     pyos.GUI.ErrorDialog("Failed to move a file.").display()
-            if src.isDir():
+            if pyos.os.path.isdir(src):
                 try:
-                    copytree(src.absolutePath, dstDir)
-                    rmtree(src.absolutePath)
+                    copytree(src, dstDir)
+                    rmtree(src)
                     count += 1
                 except:
                     pyos.GUI.ErrorDialog("Failed to move a folder.").display()
@@ -52,14 +52,14 @@ class Operations:
     @staticmethod
     def delete(items):
         for item in items:
-            if item.isFile():
+            if pyos.os.path.isfile(item):
                 try:
-                    pyos.os.remove(item.absolutePath)
+                    pyos.os.remove(item)
                 except:
                     pyos.GUI.ErrorDialog("Failed to remove a file.").display()
-            if item.isDir():
+            if pyos.os.path.isdir(item):
                 try:
-                    rmtree(item.absolutePath)
+                    rmtree(item)
                 except:
                     pyos.GUI.ErrorDialog("Failed to remove a folder.").display()
                     
@@ -79,19 +79,11 @@ class Operations:
                     
 class ApplicationSupport(object):
     def __init__(self):
-        self.applications = {}
-        for app in state.getApplicationList().getApplicationList():
-            if "file" in app.parameters:
-                self.applications[app] = app.parameters["file"]
         self.currentlySelected = None
         self.selectionDialog = None
     
     def getSuitableApps(self, ftype):
-        suitable = []
-        for app, data in self.applications.iteritems():
-            if ftype in data or ftype.lower() in data:
-                suitable.append(app)
-        return suitable
+        return state.get_application_list().get_file_handlers(ftype)
     
     def launch(self, path):
         self.cancelLaunch()
@@ -106,7 +98,7 @@ class ApplicationSupport(object):
         
     def setCurrentSelection(self, name):
         try:
-            self.currentlySelected = [app for app in self.applications.keys() if app.name == name][0]
+            self.currentlySelected = state.get_application_list().get_app(name)
         except:
             self.currentlySelected = None
             
@@ -139,44 +131,46 @@ class FileEntry(pyos.GUI.Container):
     def getFileName(absolute):
         return absolute[absolute.rfind("/")+1:]
     
-    def __init__(self, position, filepath, **data):
-        self.absolutePath = filepath.replace("\\", "/")
-        self.shortPath = FileEntry.getFileName(self.absolutePath)
+    def __init__(self, position, filepath=None, **data):
+        # Entries are recycled by the file list, so everything that depends on the path is set in setPath.
         data["onClickData"] = (self,)
-        data["onLongClickData"] = (self.shortPath, self.absolutePath)
         super(FileEntry, self).__init__(position, **data)
         self.selected = False
-        if data.get("selected", False):
-            self.toggleSelection()
         self.onSelected = data.get("onSelected", None)
         self.onDeselected = data.get("onDeselected", None)
-        
-        self.icon = None
-        if self.isFile():
-            self.icon = pyos.GUI.Image((0, 0), surface=state.getIcons().getLoadedIcon("file"), width=40, height=40,
-                                       onClick=self.toggleSelection,
-                                       onLongClick=self.eventBindings.get("onClick", pyos.Application.dummy), onLongClickData=(self,))
-        if self.isDir():
-            self.icon = pyos.GUI.Image((0, 0), surface=state.getIcons().getLoadedIcon("folder"), width=40, height=40,
-                                       onClick=self.toggleSelection,
-                                       onLongClick=self.eventBindings.get("onClick", pyos.Application.dummy), onLongClickData=(self,))
-        self.sizeText = pyos.GUI.Text((self.width-40, 12), self.getSize(), state.getColorPalette().getColor("item"), 16,
-                                      onClick=self.eventBindings.get("onClick", pyos.Application.dummy), onClickData=(self,),
-                                      onLongClick=self.eventBindings.get("onLongClick", pyos.Application.dummy), onLongClickData=(self.shortPath, self.absolutePath))
-        self.text = pyos.GUI.Text((41, 12), self.shortPath, state.getColorPalette().getColor("item"), 16,
-                                  onClick=self.eventBindings.get("onClick", pyos.Application.dummy), onClickData=(self,),
-                                  onLongClick=self.eventBindings.get("onLongClick", pyos.Application.dummy), onLongClickData=(self.shortPath, self.absolutePath))
-        self.addChild(self.icon)
-        self.addChild(self.text)
-        self.addChild(self.sizeText)
+        onClick = data.get("onClick", pyos.Application.dummy)
+        onLongClick = data.get("onLongClick", pyos.Application.dummy)
+        self.icon = pyos.GUI.Image((0, 0), surface=state.get_icons().get_loaded_icon("file"), width=40, height=40,
+                                   onClick=self.toggleSelection,
+                                   onLongClick=onClick, onLongClickData=(self,))
+        self.sizeText = pyos.GUI.Text((self.width-40, 12), "-", state.get_color_palette().get_color("item"), 16,
+                                      onClick=onClick, onClickData=(self,), onLongClick=onLongClick)
+        self.text = pyos.GUI.Text((41, 12), "", state.get_color_palette().get_color("item"), 16,
+                                  onClick=onClick, onClickData=(self,), onLongClick=onLongClick)
+        self.add_child(self.icon)
+        self.add_child(self.text)
+        self.add_child(self.sizeText)
+        if filepath is not None:
+            self.setPath(filepath, data.get("selected", False))
+        
+    def setPath(self, filepath, selected=False):
+        self.absolutePath = filepath.replace("\\", "/")
+        self.shortPath = FileEntry.getFileName(self.absolutePath)
+        for component in (self, self.text, self.sizeText):
+            component.event_data["onLongClick"] = (self.shortPath, self.absolutePath)
+        self.icon.set_image(surface=state.get_icons().get_loaded_icon("folder" if self.isDir() else "file"))
+        self.text.set_text(self.shortPath)
+        self.sizeText.set_text(self.getSize())
+        self.selected = selected
+        self.background_color = state.get_color_palette().get_color("accent" if selected else "background")
         
     def onSelect(self):
         if self.onSelected != None:
-            self.onSelected(self)
+            self.onSelected(self.absolutePath)
     
     def onDeselect(self):
         if self.onDeselected != None:
-            self.onDeselected(self)
+            self.onDeselected(self.absolutePath)
         
     def isFile(self):
         return pyos.os.path.isfile(self.absolutePath)
@@ -194,10 +188,10 @@ class FileEntry(pyos.GUI.Container):
     def toggleSelection(self):
         self.selected = not self.selected
         if self.selected:
-            self.backgroundColor = state.getColorPalette().getColor("accent")
+            self.background_color = state.get_color_palette().get_color("accent")
             self.onSelect()
         else:
-            self.backgroundColor = state.getColorPalette().getColor("background")
+            self.background_color = state.get_color_palette().get_color("background")
             self.onDeselect()
 
 class FileExplorer(pyos.GUI.Container):    
@@ -205,9 +199,11 @@ class FileExplorer(pyos.GUI.Container):
         super(FileExplorer, self).__init__(position, **data)
         self.path = str(pyos.__file__).rstrip(".pyos.pyc").replace("\\", "/")
         self.selected = []
-        self.fileList = pyos.GUI.ListScrollableContainer((0, 40), width=self.width, height=self.height-40, color=state.getColorPalette().getColor("background"),
-                                                         margin=0, padding=0, scrollAmount=80,
-                                                         onLongClick=self.newFolderAsk)
+        self.entries = []
+        self.fileList = pyos.GUI.VirtualListContainer((0, 40), self, width=self.width, height=self.height-40, color=state.get_color_palette().get_color("background"),
+                                                      rowHeight=40, scrollAmount=80,
+                                                      onLongClick=self.newFolderAsk)
+        self.emptyText = pyos.GUI.Text((2, 42), "This folder is empty.", state.get_color_palette().get_color("item"))
         self.addChild(self.fileList)
         self.generateButtonBar()
         self.appSupport = ApplicationSupport()
@@ -240,24 +236,34 @@ class FileExplorer(pyos.GUI.Container):
         self.addChild(self.buttonBar)
         
     def scanDir(self):
-        entries = pyos.os.listdir(self.path)
-        entries = [e for e in entries if not e.startswith(".")]
-        files = sorted([e for e in entries if pyos.os.path.isfile(pyos.os.path.join(self.path, e))])
+        entries = [e for e in pyos.os.listdir(self.path) if not e.startswith(".")]
         folders = sorted([e for e in entries if pyos.os.path.isdir(pyos.os.path.join(self.path, e))])
+        files = sorted(set(entries).difference(folders))
         return folders + files
     
+    def count(self):
+        return len(self.entries)
+    
+    def create_row(self, width, height):
+        return FileEntry((0, 0), width=width, height=height, color=state.get_color_palette().get_color("background"),
+                         onSelected=self.selected.append, onDeselected=self.selected.remove,
+                         onClick=self.navToSub, onLongClick=self.renameAsk)
+    
+    def bind(self, row, index):
+        path = pyos.os.path.join(self.path, self.entries[index]).replace("\\", "/")
+        row.onSelected = self.selected.append
+        row.onDeselected = self.selected.remove
+        row.setPath(path, path in self.selected)
+    
     def loadDir(self):
-        self.fileList.clearChildren()
-        for entry in self.scanDir():
-            entryContainer = FileEntry((0, -80), pyos.os.path.join(self.path, entry), width=self.fileList.container.width, height=40,
-                                             color=state.getColorPalette().getColor("background"), selected=(pyos.os.path.join(self.path, entry) in self.selected),
-                                             onSelected=self.selected.append, onDeselected=self.selected.remove,
-                                             onClick=self.navToSub,
-                                             onLongClick=self.renameAsk
-                                       )
-            self.fileList.addChild(entryContainer)
-        if self.fileList.container.childComponents == []:
-            self.fileList.addChild(pyos.GUI.Text((2, 2), "This folder is empty.", state.getColorPalette().getColor("item")))
+        # Only the names are listed here; the list creates and binds rows for the visible entries.
+        self.entries = self.scanDir()
+        self.fileList.offset = 0
+        self.fileList.reload()
+        if self.emptyText in self.child_components:
+            self.remove_child(self.emptyText)
+        if self.entries == []:
+            self.add_child(self.emptyText)
             
     def navUp(self):
         self.path = self.path[:self.path.rfind("/")]
@@ -1,4 +1,6 @@
 import pyos
+from hashlib import sha1
+from threading import Lock
 
 def onStart(s, a):
     global state, app
@@ -29,6 +31,68 @@ def aspect_scale(img, (bx, by)):
             sy = by
     return pyos.pygame.transform.scale(img, (int(sx), int(sy)))
 
+class ThumbnailStore(object):
+    """Pre-scaled thumbnails on disk, keyed by path, mtime, file size and target size.
+    The file modification time doubles as the last use, for least-recently-used cleanup."""
+    def __init__(self, folder="temp/thumbnails", maxBytes=8388608):
+        self.folder = folder
+        self.maxBytes = maxBytes
+        self.usedBytes = None
+        
+    def getFile(self, path, size):
+        stat = pyos.os.stat(path)
+        key = "%s|%d|%d|%dx%d" % (pyos.os.path.abspath(path), int(stat.st_mtime), stat.st_size, size[0], size[1])
+        if isinstance(key, unicode):
+            key = key.encode("utf-8")
+        return pyos.os.path.join(self.folder, sha1(key).hexdigest() + ".png")
+        
+    def get(self, path, size):
+        try:
+            thumbFile = self.getFile(path, size)
+            if not pyos.os.path.exists(thumbFile): return None
+            surface = pyos.pygame.image.load(thumbFile)
+            pyos.os.utime(thumbFile, None)
+            return surface
+        except:
+            return None
+        
+    def put(self, path, size, surface):
+        try:
+            if not pyos.os.path.exists(self.folder):
+                pyos.os.makedirs(self.folder)
+            thumbFile = self.getFile(path, size)
+            pyos.pygame.image.save(surface, thumbFile + ".tmp.png")
+            pyos.os.rename(thumbFile + ".tmp.png", thumbFile)
+            if self.usedBytes is None:
+                self.usedBytes = sum([pyos.os.path.getsize(pyos.os.path.join(self.folder, f)) for f in pyos.os.listdir(self.folder)])
+            else:
+                self.usedBytes += pyos.os.path.getsize(thumbFile)
+            if self.usedBytes > self.maxBytes:
+                self.cleanup()
+        except:
+            pass
+        
+    def cleanup(self):
+        files = [pyos.os.path.join(self.folder, f) for f in pyos.os.listdir(self.folder)]
+        files = sorted([(pyos.os.path.getmtime(f), pyos.os.path.getsize(f), f) for f in files])
+        self.usedBytes = sum([f[1] for f in files])
+        for mtime, fsize, f in files:
+            if self.usedBytes <= self.maxBytes * 3 / 4: break
+            try:
+                pyos.os.remove(f)
+                self.usedBytes -= fsize
+            except:
+                pass
+            
+    def getThumbnail(self, path, size):
+        surface = self.get(path, size)
+        if surface is None:
+            surface = aspect_scale(pyos.pygame.image.load(path), size)
+            self.put(path, size, surface)
+        return surface
+    
+thumbnailStore = ThumbnailStore()
+
 class GalleryThumbnail(pyos.GUI.Container):
     def __init__(self, position, w, h, image, imageLoadApp):
         self.imageLoadApp = imageLoadApp
@@ -38,6 +102,8 @@ class GalleryThumbnail(pyos.GUI.Container):
                                                onClick=self.open)
         self.SKIP_CHILD_CHECK = True
         self.picture = pyos.GUI.Image(((self.width/2)-20, ((self.height-20)/2)-20), path="apps/gallery/loading.png")
+        self.placeholder = self.picture.originalSurface
+        self.loaded = False
         self.title = pyos.GUI.Text((2, self.height-19), self.image.replace("\\", "/")[self.image.replace("\\", "/").rfind("/")+1:],
                                    state.getColorPalette().getColor("item"), 16)
         self.addChild(self.picture)
@@ -47,8 +113,20 @@ class GalleryThumbnail(pyos.GUI.Container):
         self.imageLoadApp.file = self.image
         self.imageLoadApp.activate()
         
-    def loadRealImage(self):
-        img = aspect_scale(pyos.pygame.image.load(self.image), (self.width, self.height-20))
+    def loadThumbnail(self):
+        # Called on the loader thread, so it only decodes; the picture is swapped by showLoadedImage on the UI thread.
+        return thumbnailStore.getThumbnail(self.image, (self.width, self.height-20))
+        
+    def showLoadedImage(self, img):
+        # Skipped when the page was left, and the thumbnail unloaded, before this ran.
+        if self.loaded:
+            self.showImage(img)
+        
+    def unloadImage(self):
+        self.loaded = False
+        self.showImage(self.placeholder)
+        
+    def showImage(self, img):
         self.picture.setImage(surface=img, resize=True)
         self.picture.position[0] = pyos.GUI.getCenteredCoordinates(self.picture, self)[0]
         self.picture.position[1] = ((self.height-20)/2)-(self.picture.height/2)
@@ -57,8 +135,14 @@ class Gallery(object):
     def __init__(self):
         self.filesApp = state.getApplicationList().getApp("files")
         self.imageViewerApp = state.getApplicationList().getApp("image-viewer")
+        self.containers = []
+        self.keepPages = 2
+        self.generation = 0
+        self.loaderGeneration = None
+        self.loaderLock = Lock()
         
-        self.pages = pyos.GUI.GriddedPagedContainer((0, 40), 2, 2, width=app.ui.width, height=app.ui.height-40, color=state.getColorPalette().getColor("background"), margin=0, padding=0)
+        self.pages = pyos.GUI.GriddedPagedContainer((0, 40), 2, 2, width=app.ui.width, height=app.ui.height-40, color=state.getColorPalette().getColor("background"), margin=0, padding=0,
+                                                    onPageChanged=self.pageChanged)
         self.titleText = pyos.GUI.Text((2, 6), "Gallery", state.getColorPalette().getColor("item"), 24)
         self.path = app.dataStore.get("path", "")
         self.selectBtn = pyos.GUI.Image((app.ui.width-40, 0), surface=self.filesApp.getIcon(),
@@ -66,18 +150,63 @@ class Gallery(object):
         app.ui.addChild(self.pages)
         app.ui.addChild(self.titleText)
         app.ui.addChild(self.selectBtn)
-        self.containers = []
+        self.perPage = self.pages.rows * self.pages.columns
         self.pages.addPage(self.pages.generatePage())
         self.pages.goToPage()
         if self.path != "":
             self.loadDir(self.path)
         
-    def loadThumbnails(self):
-        for cont in self.containers:
-            cont.loadRealImage()
+    def getPageContainers(self, page):
+        if page < 0: return []
+        return self.containers[page*self.perPage:(page+1)*self.perPage]
+        
+    def getNextToLoad(self):
+        current = self.pages.current_page
+        for distance in range(self.keepPages+1):
+            for page in sorted(set([current, current+distance, current-distance])):
+                for cont in self.getPageContainers(page):
+                    if not cont.loaded: return cont
+        return None
+        
+    def loadThumbnails(self, generation):
+        # The current page loads first, then the pages around it. A newer folder cancels this loader.
+        while True:
+            with self.loaderLock:
+                cont = self.getNextToLoad() if generation == self.generation else None
+                if cont is None:
+                    if self.loaderGeneration == generation:
+                        self.loaderGeneration = None
+                    return
+            try:
+                img = cont.loadThumbnail()
+            except:
+                cont.loaded = True
+                continue
+            with self.loaderLock:
+                if (generation == self.generation and
+                        abs((self.containers.index(cont) / self.perPage) - self.pages.current_page) <= self.keepPages):
+                    cont.loaded = True
+                    state.get_thread_controller().add_thread(pyos.Task(cont.showLoadedImage, img))
+            
+    def startLoader(self):
+        with self.loaderLock:
+            if self.loaderGeneration == self.generation: return
+            self.loaderGeneration = self.generation
+        state.get_thread_controller().add_thread(pyos.ParallelTask(self.loadThumbnails, self.generation))
+        
+    def pageChanged(self, page):
+        # Only pages near the current one keep their decoded thumbnails.
+        if self.containers == []: return
+        with self.loaderLock:
+            for index, cont in enumerate(self.containers):
+                if cont.loaded and abs((index / self.perPage) - page) > self.keepPages:
+                    cont.unloadImage()
+        self.startLoader()
         
     def loadDir(self, path):
         if not pyos.os.path.exists(path): return
+        with self.loaderLock:
+            self.generation += 1
         self.path = path
         self.pages.clearChildren()
         self.containers = []
@@ -88,7 +217,7 @@ class Gallery(object):
             self.pages.addChild(tn)
             self.containers.append(tn)
         app.dataStore["path"] = self.path
-        state.getThreadController().addThread(pyos.ParallelTask(self.loadThumbnails))
+        self.startLoader()
         
     def selectDir(self):
         startDir = str(pyos.__file__).rstrip("pyos.pyc") if self.path=="" else self.path
@@ -8,22 +8,22 @@ def onLoad(s, a):
     global app, state
     app = a
     state = s
-    welcomeText = pyos.GUI.Text((5, 5), "Welcome to Python OS 6.", state.getColorPalette().getColor("item"), 15)
-    app.ui.addChild(welcomeText)
+    welcomeText = pyos.GUI.Text((5, 5), "Welcome to Python OS 6.", state.get_color_palette().get_color("item"), 15)
+    app.ui.add_child(welcomeText)
     
 def onUnload():
-    state.getFunctionBar().container.backgroundColor = state.getColorPalette().getColor("background")
-    state.getFunctionBar().clock_text.color = state.getColorPalette().getColor("accent")
-    state.getFunctionBar().app_title_text.color = state.getColorPalette().getColor("item")
-    state.getFunctionBar().app_title_text.refresh()
-    state.getFunctionBar().clock_text.refresh()
+    state.get_function_bar().container.background_color = state.get_color_palette().get_color("background")
+    state.get_function_bar().clock_text.color = state.get_color_palette().get_color("accent")
+    state.get_function_bar().app_title_text.color = state.get_color_palette().get_color("item")
+    state.get_function_bar().app_title_text.refresh()
+    state.get_function_bar().clock_text.refresh()
     
 def run():
     time = pyos.datetime.now()
     timetuple = (3*time.hour, 3*time.minute, 4.25*time.second)
     inverse = (255-timetuple[0], 255-timetuple[1], 255-timetuple[2])
-    state.getFunctionBar().container.backgroundColor = timetuple
-    state.getFunctionBar().app_title_text.color = inverse
-    state.getFunctionBar().clock_text.color = inverse
-    state.getFunctionBar().app_title_text.refresh()
-    state.getFunctionBar().clock_text.refresh()
\ No newline at end of file
+    state.get_function_bar().container.background_color = timetuple
+    state.get_function_bar().app_title_text.color = inverse
+    state.get_function_bar().clock_text.color = inverse
+    state.get_function_bar().app_title_text.refresh()
+    state.get_function_bar().clock_text.refresh()
\ No newline at end of file
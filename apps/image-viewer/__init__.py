@@ -1,30 +1,116 @@
 import pyos
+import struct
 
-def loadImage(path):
-    state.getGUI().displayStandbyText("Loading image")
-    img = None
+try:
+    from PIL import Image as PILImage
+    pilAvailable = True
+except:
+    pilAvailable = False
+
+# The most memory a decoded image may take, at 4 bytes per pixel.
+MAX_IMAGE_BYTES = 33554432
+JPEG_SOF_MARKERS = "\xc0\xc1\xc2\xc3\xc5\xc6\xc7\xc9\xca\xcb\xcd\xce\xcf"
+
+currentPath = None
+
+class ImageTooLarge(Exception):
+    pass
+
+def readImageSize(path):
+    # Reads the dimensions from the file header without decoding, or returns None for unknown formats.
+    f = open(path, "rb")
     try:
+        head = f.read(26)
+        if head.startswith("\x89PNG\r\n\x1a\n"):
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in ("GIF87a", "GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head.startswith("BM"):
+            w, h = struct.unpack("<ii", head[18:26])
+            return w, abs(h)
+        if head.startswith("\xff\xd8"):
+            f.seek(2)
+            while True:
+                byte = f.read(1)
+                while byte == "\xff":
+                    byte = f.read(1)
+                if byte == "": return None
+                if byte in JPEG_SOF_MARKERS:
+                    f.read(3)
+                    h, w = struct.unpack(">HH", f.read(4))
+                    return w, h
+                f.seek(struct.unpack(">H", f.read(2))[0] - 2, 1)
+        return None
+    finally:
+        f.close()
+
+def fitSize((ix, iy), (bx, by)):
+    if ix <= bx and iy <= by:
+        return ix, iy
+    scale_factor = min(bx/float(ix), by/float(iy))
+    return max(1, int(ix * scale_factor)), max(1, int(iy * scale_factor))
+
+def decodeImage(path, bounds):
+    # Landscape images are shown rotated, so they are fitted to the swapped bounds before rotating.
+    if pilAvailable:
+        img = PILImage.open(path)
+        rotate = img.size[0] > img.size[1]
+        target = fitSize(img.size, (bounds[1], bounds[0]) if rotate else bounds)
+        # The draft only shrinks JPEGs, so other formats are checked at their full size.
+        img.draft("RGB", target)
+        if img.size[0] * img.size[1] * 4 > MAX_IMAGE_BYTES:
+            raise ImageTooLarge()
+        mode = "RGBA" if "A" in img.mode or "transparency" in img.info else "RGB"
+        img = img.convert(mode)
+        if img.size != target:
+            img = img.resize(target, PILImage.ANTIALIAS)
+        img = pyos.pygame.image.fromstring(img.tobytes(), img.size, mode)
+    else:
+        # pygame can only decode the whole image, so its size is read from the header first.
+        size = readImageSize(path)
+        if size is not None and size[0] * size[1] * 4 > MAX_IMAGE_BYTES:
+            raise ImageTooLarge()
         img = pyos.pygame.image.load(path)
-    except:
-        pyos.GUI.ErrorDialog("Cannot load image.").display()
-        return
-    app.ui.clearChildren()
-    if img.get_width() > img.get_height():
+        rotate = img.get_width() > img.get_height()
+        target = fitSize(img.get_size(), (bounds[1], bounds[0]) if rotate else bounds)
+        if img.get_size() != target:
+            if img.get_bitsize() in (24, 32):
+                img = pyos.pygame.transform.smoothscale(img, target)
+            else:
+                img = pyos.pygame.transform.scale(img, target)
+    if rotate:
         img = pyos.pygame.transform.rotate(img, 90)
-    if img.get_width() > app.ui.width:
-        ix, iy = img.get_size()
-        scale_factor = app.ui.height/float(iy)
-        sx = scale_factor * ix
-        if sx > app.ui.width:
-            scale_factor = app.ui.width/float(ix)
-            sx = app.ui.width
-            sy = scale_factor * iy
-        else:
-            sy = app.ui.height
-        img = pyos.pygame.transform.scale(img, (int(sx), int(sy)))
+    return img
+
+def showImage(path, img):
+    if path != currentPath: return
+    app.ui.clear_children()
     image = pyos.GUI.Image((0, 0), surface=img)
-    image.position = pyos.GUI.getCenteredCoordinates(image, app.ui)
-    app.ui.addChild(image)
+    image.position = pyos.GUI.get_centered_coordinates(image, app.ui)
+    app.ui.add_child(image)
+
+def showError(path, exception):
+    if path != currentPath: return
+    app.ui.clear_children()
+    if isinstance(exception, ImageTooLarge):
+        pyos.GUI.ErrorDialog("The image is too large to display.").display()
+    else:
+        pyos.GUI.ErrorDialog("Cannot load image.").display()
+
+def onUIThread(method, *args):
+    # The decode future completes on the task's worker thread, so the UI is changed from a Task run by the controller.
+    state.get_thread_controller().add_thread(pyos.Task(method, *args))
+
+def loadImage(path):
+    global currentPath
+    currentPath = path
+    app.ui.clear_children()
+    placeholder = pyos.GUI.Text((0, 0), "Loading image...", state.get_color_palette().get_color("item"), 18)
+    placeholder.position = pyos.GUI.get_centered_coordinates(placeholder, app.ui)
+    app.ui.add_child(placeholder)
+    task = pyos.ParallelTask(decodeImage, path, (app.ui.width, app.ui.height))
+    task.get_future().on_success(onUIThread, showImage, path).on_failure(onUIThread, showError, path)
+    state.get_thread_controller().add_thread(task)
 
 def onStart(s, a):
     global state, app
@@ -34,4 +120,4 @@ def onStart(s, a):
         loadImage(app.file)
     else:
         state.getApplicationList().getApp("files").getModule().FilePicker((10, 10), app, width=app.ui.width-20, height=app.ui.height-20,
-                                                                          onSelect=loadImage).display()
\ No newline at end of file
+                                                                          onSelect=loadImage).display()
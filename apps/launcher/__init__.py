@@ -53,29 +53,35 @@ def uninstall(app, resp):
         loadApps(state, application)
         state.getNotificationQueue().push(pyos.Notification("Uninstalled", "The app "+app.title+" is gone.", image=state.getIcons().getLoadedIcon("menu")))
 
+def buildAppPane(app, pagedContainer):
+    appPane = None
+    if app in state.getApplicationList().activeApplications:
+        appPane = pyos.GUI.Container((0, 0), color=state.getColorPalette().getColor("accent")+(100,), width=pagedContainer.perColumn, height=pagedContainer.perRow,
+                                     onClick=app.activate, onLongClick=displayInfoDialog, onLongClickData=(app,))
+    else:
+        appPane = pyos.GUI.Container((0, 0), transparent=True, width=pagedContainer.perColumn, height=pagedContainer.perRow,
+                                     onClick=app.activate, onLongClick=displayInfoDialog, onLongClickData=(app,))
+    appPane.SKIP_CHILD_CHECK = True
+    appIcon = pyos.GUI.Image((0, 0), surface=app.getIcon(), onClick=app.activate) #Long click uninstall
+    appName = pyos.GUI.Text((0, appIcon.height), app.title, state.getColorPalette().getColor("item"), 12,
+                            onClick=app.activate, onLongClick=uninstallAsk, onLongClickData=(app,))
+    appIcon.position[0] = pyos.GUI.getCenteredCoordinates(appIcon, appPane)[0]
+    appName.position[0] = pyos.GUI.getCenteredCoordinates(appName, appPane)[0]
+    appPane.addChild(appIcon)
+    appPane.addChild(appName)
+    return appPane
+
 def loadApps(pstate, app):
     global application, state
     state = pstate
     application = state.getActiveApplication()
     application.ui.backgroundColor = state.getColorPalette().getColor("background")
     pagedContainer = pyos.GUI.GriddedPagedContainer((0, 0), 4, width=application.ui.width, height=application.ui.height, color=state.getColorPalette().getColor("background"))
-    for app in alphabetize(getVisibleAppList()):
-        appPane = None
-        if app in state.getApplicationList().activeApplications:
-            appPane = pyos.GUI.Container((0, 0), color=state.getColorPalette().getColor("accent")+(100,), width=pagedContainer.perColumn, height=pagedContainer.perRow,
-                                         onClick=app.activate, onLongClick=displayInfoDialog, onLongClickData=(app,))
-        else:
-            appPane = pyos.GUI.Container((0, 0), transparent=True, width=pagedContainer.perColumn, height=pagedContainer.perRow,
-                                         onClick=app.activate, onLongClick=displayInfoDialog, onLongClickData=(app,))
-        appPane.SKIP_CHILD_CHECK = True
-        appIcon = pyos.GUI.Image((0, 0), surface=app.getIcon(), onClick=app.activate) #Long click uninstall
-        appName = pyos.GUI.Text((0, appIcon.height), app.title, state.getColorPalette().getColor("item"), 12,
-                                onClick=app.activate, onLongClick=uninstallAsk, onLongClickData=(app,))
-        appIcon.position[0] = pyos.GUI.getCenteredCoordinates(appIcon, appPane)[0]
-        appName.position[0] = pyos.GUI.getCenteredCoordinates(appName, appPane)[0]
-        appPane.addChild(appIcon)
-        appPane.addChild(appName)
-        pagedContainer.addChild(appPane)
+    apps = alphabetize(getVisibleAppList())
+    perPage = pagedContainer.rows * pagedContainer.columns
+    # Panes are built when their page is first shown.
+    def buildPage(number):
+        return [buildAppPane(a, pagedContainer) for a in apps[number*perPage:(number+1)*perPage]]
+    pagedContainer.set_page_factory((len(apps) + perPage - 1) / perPage, buildPage)
     application.ui.addChild(pagedContainer)
-    pagedContainer.goToPage()
     
\ No newline at end of file
@@ -105,6 +105,7 @@ class MusicPlayer(object):
         
     def populatePlaylistScroller(self):
         self.playlistScroller.clearChildren()
+        entries = []
         for song in self.playlist:
             cont = pyos.GUI.Container((0, 0), transparent=True, width=self.playlistScroller.container.width, height=40, border=1, borderColor=state.getColorPalette().getColor("item"),
                                       onClick=self.loadSong, onClickData=(song,))
@@ -112,7 +113,8 @@ class MusicPlayer(object):
             rmbtn = pyos.GUI.Image((cont.width-40, 0), path="apps/music-player/remove.png", onClick=self.removeFromList, onClickData=(song,))
             cont.addChild(title)
             cont.addChild(rmbtn)
-            self.playlistScroller.addChild(cont)
+            entries.append(cont)
+        self.playlistScroller.add_children(*entries)
         
     def generatePlaylistScreen(self):
         self.playlistScreen = self.screens.generatePage()
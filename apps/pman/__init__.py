@@ -159,54 +159,85 @@ class MainPage(Page):
         else:
             pyos.GUI.OKDialog("No Results", "Your search returned no relevant results.").display()
                 
+class AppListRow(pyos.GUI.Container):
+    # Rows are recycled by the app list, so the handlers look up whichever app the row shows now.
+    def __init__(self, width, height, color):
+        super(AppListRow, self).__init__((0, 0), width=width, height=height, color=color, border=1, borderColor=(20, 20, 20))
+        self.app = None
+        self.icon = pyos.GUI.Image((0, 0), surface=state.get_icons().get_loaded_icon("unknown"), width=40, height=40,
+                                   onClick=self.openAppPage)
+        self.titleText = pyos.GUI.Text((42, 0), "Application", state.get_color_palette().get_color("item"), 24,
+                                       onClick=self.openAppPage)
+        self.authorText = pyos.GUI.Text((42, 24), "Author", (20, 20, 20), 14,
+                                        onClick=self.openAppPage)
+        self.button = pyos.GUI.Button((self.width-60, 0), "Install", (100, 100, 250), (20, 20, 20), 18, width=60, height=40,
+                                      onClick=self.buttonAction)
+        self.add_child(self.icon)
+        self.add_child(self.titleText)
+        self.add_child(self.authorText)
+        self.add_child(self.button)
+        
+    def setApp(self, app, title, author, icon):
+        self.app = app
+        self.icon.set_image(surface=icon)
+        self.titleText.set_text(title)
+        self.authorText.set_text(author)
+        if app in pman.installedApps:
+            self.button.background_color = (100, 250, 100)
+            self.button.set_text("Open")
+        else:
+            self.button.background_color = (100, 100, 250)
+            self.button.set_text("Install")
+        
+    def openAppPage(self):
+        AppPage.addAppPage(self.app)
+        
+    def buttonAction(self):
+        if self.app in pman.installedApps:
+            state.get_application_list().get_app(self.app).activate()
+        else:
+            PackageManager.installAsk(self.app)
+            
 class AppListPage(Page):    
     def __init__(self, title, alist, w, h, c, alpha=True):
         super(AppListPage, self).__init__(w, h, c)
         self.title = title
-        self.pages = pyos.GUI.ListPagedContainer((0, 0), width=self.width, height=self.height, color=self.backgroundColor, margin=0)
-        toload = []
-        listToUse = []
-        if alpha: listToUse = sorted(alist)
-        else: listToUse = alist
-        for a in listToUse:
-            container = pyos.GUI.Container((0, 0), width=self.width, height=40, color=self.backgroundColor, border=1, borderColor=(20, 20, 20))
-            icon = pyos.GUI.Image((0, 0), surface=state.getIcons().getLoadedIcon("unknown"), width=40, height=40,
-                                  onClick=AppPage.addAppPage, onClickData=(a,))
-            title = pyos.GUI.Text((42, 0), "Application", state.getColorPalette().getColor("item"), 24,
-                                  onClick=AppPage.addAppPage, onClickData=(a,))
-            author = pyos.GUI.Text((42, 24), "Author", (20, 20, 20), 14,
-                                   onClick=AppPage.addAppPage, onClickData=(a,))
-            inst_btn = None
-            if a in pman.installedApps:
-                inst_btn = pyos.GUI.Button((container.width-60, 0), "Open", (100, 250, 100), (20, 20, 20), 18, width=60, height=40,
-                                              onClick=state.getApplicationList().getApp(a).activate)
-                localApp = state.getApplicationList().getApp(a)
-                icn = localApp.getIcon()
-                if icn == False: icn = state.getIcons().getLoadedIcon("unknown")
-                icon.setImage(surface=icn)
-                title.setText(localApp.title)
-                author.setText(localApp.author)
-            else:
-                inst_btn = pyos.GUI.Button((container.width-60, 0), "Install", (100, 100, 250), (20, 20, 20), 18, width=60, height=40,
-                                           onClick=PackageManager.installAsk, onClickData=(a,))
-                toload.append([a, title, author, icon])
-            container.addChild(icon)
-            container.addChild(title)
-            container.addChild(author)
-            container.addChild(inst_btn)
-            self.pages.addChild(container)
-        self.addChild(self.pages)
-        self.pages.goToPage()
+        if alpha: self.apps = sorted(alist)
+        else: self.apps = alist
+        self.info = {}
+        toload = [(index, a) for index, a in enumerate(self.apps) if a not in pman.installedApps]
+        self.list = pyos.GUI.VirtualListContainer((0, 0), self, width=self.width, height=self.height, color=self.background_color,
+                                                  rowHeight=40)
+        self.add_child(self.list)
         loadTask = pyos.ParallelTask(self.loadList, toload)
-        state.getThreadController().addThread(loadTask)
+        state.get_thread_controller().add_thread(loadTask)
+        
+    def count(self):
+        return len(self.apps)
+    
+    def create_row(self, width, height):
+        return AppListRow(width, height, self.background_color)
+    
+    def bind(self, row, index):
+        a = self.apps[index]
+        if a not in self.info and a in pman.installedApps:
+            localApp = state.get_application_list().get_app(a)
+            icn = localApp.get_icon()
+            if icn == False: icn = state.get_icons().get_loaded_icon("unknown")
+            self.info[a] = (localApp.title, localApp.author, icn)
+        title, author, icon = self.info.get(a, ("Application", "Author", state.get_icons().get_loaded_icon("unknown")))
+        row.setApp(a, title, author, icon)
         
     def loadList(self, toload):
-        for item in toload:
-            manifest = AppPage.getAppInfo(item[0])
-            item[1].setText(manifest["title"])
-            item[2].setText(manifest["author"])
-        for item in toload:
-            item[3].setImage(surface=getIcon(item[0]))
+        for index, a in toload:
+            manifest = AppPage.getAppInfo(a)
+            if manifest is not None:
+                self.info[a] = (manifest["title"], manifest["author"], state.get_icons().get_loaded_icon("unknown"))
+                self.list.rebind(index)
+        for index, a in toload:
+            if a in self.info:
+                self.info[a] = self.info[a][:2] + (getIcon(a),)
+                self.list.rebind(index)
             
 class UpdateListPage(Page):    
     def __init__(self, title, w, h, c):
@@ -236,7 +267,7 @@ class UpdateListPage(Page):
             container.addChild(title)
             container.addChild(author)
             container.addChild(inst_btn)
-            self.scroller.addChild(container)
+        self.scroller.add_children(*[item[1] for item in toload])
         self.addChild(self.scroller)
         loadTask = pyos.ParallelTask(self.loadList, toload)
         state.getThreadController().addThread(loadTask)
@@ -259,8 +290,7 @@ class UpdateListPage(Page):
             else:
                 newOrder.append(item[1])
         self.scroller.clearChildren()
-        for child in newOrder:
-            self.scroller.addChild(child)
+        self.scroller.add_children(*newOrder)
     
 class PackageManager(object):
     def __init__(self):
@@ -64,9 +64,11 @@ def loadList():
     app.ui.clearChildren()
     appList = pyos.GUI.ListPagedContainer((0, 0), width=app.ui.width, height=app.ui.height, color=state.getColorPalette().getColor("background"))
     app.ui.addChild(appList)
-    for a in state.getApplicationList().getApplicationList():
-        appList.addChild(buildAppEntry(a))
-    appList.goToPage()
+    apps = state.getApplicationList().getApplicationList()
+    perPage = appList.get_page_capacity(40)
+    def buildPage(number):
+        return [buildAppEntry(a) for a in apps[number*perPage:(number+1)*perPage]]
+    appList.set_page_factory((len(apps) + perPage - 1) / perPage, buildPage)
 
 def onLoad(s, a):
     global state, app
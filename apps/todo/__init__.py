@@ -98,6 +98,6 @@ class TodoApp(object):
         
     def loadTodos(self):
         self.scroller.clearChildren()
-        for tds in todos:
-            self.scroller.addChild(genTodoContainer(tds))
-        self.scroller.addChild(genAddContainer())
\ No newline at end of file
+        entries = [genTodoContainer(tds) for tds in todos]
+        entries.append(genAddContainer())
+        self.scroller.add_children(*entries)
\ No newline at end of file
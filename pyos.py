@@ -12,9 +12,36 @@ from importlib import import_module
 from shutil import rmtree
 from zipfile import ZipFile
 from thread import start_new_thread
+from threading import Condition, Lock, RLock, Timer, current_thread
+from collections import OrderedDict
 from datetime import datetime
 from __builtin__ import staticmethod
 from traceback import format_exc
+from weakref import WeakKeyDictionary, ref
+from mmap import mmap, ACCESS_READ
+from array import array
+from zlib import compress, crc32, decompress
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from time import time
+
+try:
+    import ctypes
+
+    class Timespec(ctypes.Structure):
+        _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+    clock_gettime = ctypes.CDLL("librt.so.1", use_errno=True).clock_gettime
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(Timespec)]
+    clock_timespec = Timespec()
+
+    def monotonic():
+        # type: () -> float
+        # 1 is CLOCK_MONOTONIC
+        clock_gettime(1, ctypes.byref(clock_timespec))
+        return clock_timespec.tv_sec + clock_timespec.tv_nsec * 1e-9
+except:
+    monotonic = time
 
 # state = None
 screen = None
@@ -32,6 +59,208 @@ def read_file(path):
     return lines
 
 
+class Future(object):
+    class TimeoutError(Exception):
+        pass
+
+    class CancelledError(Exception):
+        pass
+
+    def __init__(self):
+        # type: () -> None
+        self.condition = Condition()                # type: Condition
+        self.finished = False                       # type: bool
+        self.cancelled = False                      # type: bool
+        self.value = None                           # type: Any
+        self.exception = None                       # type: Exception
+        self.callbacks = []                         # type: List[Callable[[Future], None]]
+
+    def done(self):
+        # type: () -> bool
+        return self.finished
+
+    def is_cancelled(self):
+        # type: () -> bool
+        return self.cancelled
+
+    def __complete(self, value=None, exception=None, cancelled=False):
+        # type: (Any, Optional[Exception], bool) -> bool
+        # A failing callback is reported and does not stop the others, nor the thread completing the future. An
+        # exception nothing was waiting for is printed, since the thread that raised it no longer reports it.
+        with self.condition:
+            if self.finished:
+                return False
+            self.value = value
+            self.exception = exception
+            self.cancelled = cancelled
+            self.finished = True
+            callbacks = self.callbacks
+            self.callbacks = []
+            self.condition.notify_all()
+        if exception is not None and not cancelled and len(callbacks) == 0:
+            if __import__("sys").exc_info()[1] is exception:
+                print "Unobserved future exception:\n" + format_exc()
+            else:
+                print "Unobserved future exception: " + repr(exception)
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                print "Future callback failed:\n" + format_exc()
+        return True
+
+    def set_result(self, value):
+        # type: (Any) -> bool
+        return self.__complete(value=value)
+
+    def set_exception(self, exception):
+        # type: (Exception) -> bool
+        return self.__complete(exception=exception)
+
+    def cancel(self):
+        # type: () -> bool
+        return self.__complete(exception=Future.CancelledError(), cancelled=True)
+
+    def wait(self, timeout=None):
+        # type: (Optional[float]) -> bool
+        """Blocks until the future completes or the timeout (in seconds) passes. Do not call from the UI thread."""
+        with self.condition:
+            if not self.finished:
+                self.condition.wait(timeout)
+            return self.finished
+
+    def result(self, timeout=None):
+        # type: (Optional[float]) -> Any
+        if not self.wait(timeout):
+            raise Future.TimeoutError("The future did not complete within " + str(timeout) + " seconds.")
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+    def get_exception(self):
+        # type: () -> Exception
+        return self.exception
+
+    def add_done_callback(self, callback):
+        # type: (Callable[[Future], None]) -> Future
+        """Callbacks run on the thread that completes the future, so a ParallelTask's run on its worker thread."""
+        with self.condition:
+            if not self.finished:
+                self.callbacks.append(callback)
+                return self
+        callback(self)
+        return self
+
+    def on_success(self, method, *additional_data):
+        # type: (Callable, Tuple[...]) -> Future
+        def helper(future):
+            if future.exception is None:
+                method(*(additional_data + (future.value,)))
+        return self.add_done_callback(helper)
+
+    def on_failure(self, method, *additional_data):
+        # type: (Callable, Tuple[...]) -> Future
+        def helper(future):
+            if future.exception is not None:
+                method(*(additional_data + (future.exception,)))
+        return self.add_done_callback(helper)
+
+    def then(self, method, *additional_data):
+        # type: (Callable, Tuple[...]) -> Future
+        """Returns a new future resolved with the method's return value. If that value is a Future, it is followed.
+
+        Like every callback, the method runs on the thread that completes this future. A ParallelTask completes it on
+        its worker thread, so a method that changes the UI must be queued as a Task on the thread controller instead.
+        """
+        chained = Future()
+
+        def helper(future):
+            if future.exception is not None:
+                chained.set_exception(future.exception)
+                return
+            try:
+                returned = method(*(additional_data + (future.value,)))
+            except Exception as e:
+                chained.set_exception(e)
+                return
+            if isinstance(returned, Future):
+                returned.add_done_callback(chained.follow)
+            else:
+                chained.set_result(returned)
+        self.add_done_callback(helper)
+        return chained
+
+    def follow(self, other):
+        # type: (Future) -> None
+        if other.exception is not None:
+            self.set_exception(other.exception)
+        else:
+            self.set_result(other.value)
+
+    def expire_after(self, seconds):
+        # type: (float) -> Future
+        """Fails the future with Future.TimeoutError if it has not completed after the given number of seconds."""
+        timer = Timer(seconds, self.set_exception,
+                      (Future.TimeoutError("The future did not complete within " + str(seconds) + " seconds."),))
+        timer.daemon = True
+        self.add_done_callback(lambda future: timer.cancel())
+        timer.start()
+        return self
+
+    @staticmethod
+    def resolved(value=None):
+        # type: (Any) -> Future
+        future = Future()
+        future.set_result(value)
+        return future
+
+    @staticmethod
+    def all_of(futures):
+        # type: (List[Future]) -> Future
+        """Resolves with a list of every result, in order, or fails with the first exception raised."""
+        futures = list(futures)
+        combined = Future()
+        remaining = [len(futures)]
+        if len(futures) == 0:
+            combined.set_result([])
+            return combined
+
+        def helper(future):
+            if future.exception is not None:
+                combined.set_exception(future.exception)
+                return
+            with combined.condition:
+                remaining[0] -= 1
+                complete = remaining[0] == 0
+            if complete:
+                combined.set_result([f.value for f in futures])
+        for future in futures:
+            future.add_done_callback(helper)
+        return combined
+
+    @staticmethod
+    def any_of(futures):
+        # type: (List[Future]) -> Future
+        """Resolves (or fails) the same way as the first of the futures to complete."""
+        futures = list(futures)
+        if len(futures) == 0:
+            raise ValueError("any_of needs at least one future.")
+        combined = Future()
+        for future in futures:
+            future.add_done_callback(combined.follow)
+        return combined
+
+    @staticmethod
+    def wait_all(futures, timeout=None):
+        # type: (List[Future], Optional[float]) -> List[Any]
+        return Future.all_of(futures).result(timeout)
+
+    @staticmethod
+    def wait_any(futures, timeout=None):
+        # type: (List[Future], Optional[float]) -> Any
+        return Future.any_of(futures).result(timeout)
+
+
 class Thread(object):
     def __init__(self, method, **data):
         # type: (Callable, dict) -> None
@@ -40,6 +269,7 @@ class Thread(object):
         self.stop = False                                                   # type: bool
         self.first_run = True                                               # type: bool
         self.method = method                                                # type: Callable[...]
+        self.future = Future()                                              # type: Future
         self.pause = data.get("startPaused", False)
         self.event_bindings["onStart"] = data.get("onStart", None)
         self.event_bindings["onStop"] = data.get("onStop", None)
@@ -77,6 +307,11 @@ class Thread(object):
         # type: () -> None
         self.stop = True
         self.exec_event("onStop")
+        self.future.set_result(None)
+
+    def get_future(self):
+        # type: () -> Future
+        return self.future
 
     def run(self):
         # type: () -> None
@@ -88,6 +323,7 @@ class Thread(object):
             if not self.pause and not self.stop:
                 self.method()
         except:
+            self.future.set_exception(__import__("sys").exc_info()[1])
             State.error_recovery("Thread error.", "Thread bindings: " + str(self.event_bindings))
             self.stop = True
             self.first_run = False
@@ -102,7 +338,12 @@ class Task(Thread):
 
     def run(self):
         # type: () -> None
-        self.returned_data = self.method(*self.additional_data)
+        try:
+            self.returned_data = self.method(*self.additional_data)
+        except Exception as e:
+            self.future.set_exception(e)
+            raise
+        self.future.set_result(self.returned_data)
         self.set_stop()
 
     def get_return(self):
@@ -126,9 +367,14 @@ class StagedTask(Task):
 
     def run(self):
         # type: () -> None
-        self.returned_data = self.method(self.stage)
+        try:
+            self.returned_data = self.method(self.stage)
+        except Exception as e:
+            self.future.set_exception(e)
+            raise
         self.stage += 1
         if self.stage >= self.max_stage:
+            self.future.set_result(self.returned_data)
             self.set_stop()
 
 
@@ -158,13 +404,13 @@ class ParallelTask(Task):
             start_new_thread(self.run_helper, ())
             self.ran = True
 
-    def get_return(self):
-        # type: () -> None
-        return None
-
     def run_helper(self):
         # type: () -> None
-        self.method(*self.additional_data)
+        try:
+            self.returned_data = self.method(*self.additional_data)
+            self.future.set_result(self.returned_data)
+        except Exception as e:
+            self.future.set_exception(e)
         self.set_stop()
 
     def set_stop(self):
@@ -176,15 +422,23 @@ class Controller(object):
     def __init__(self):
         # type: () -> None
         self.threads = []                   # type: List[Union[Thread, Task, StagedTask, TimedTask, ParalelTask]]
-        self.data_requests = {}             # type: dict
+        self.data_requests = WeakKeyDictionary()    # type: Dict[Thread, Any]
 
     def request_data(self, from_thread, default=None):
-        # type: (Thread, Optional[Any]) -> None
-        self.data_requests[from_thread] = default
+        # type: (Thread, Optional[Any]) -> Future
+        """Returns the thread's future. The default is reported by get_requested_data until it completes."""
+        if not from_thread.future.done():
+            self.data_requests[from_thread] = default
+            from_thread.future.add_done_callback(lambda future: self.data_requests.pop(from_thread, None))
+        return from_thread.future
 
     def get_requested_data(self, from_thread):
         # type: (Union[Thread, Task, StagedTask, TimedTask, ParalelTask]) -> Any
-        return self.data_requests[from_thread]
+        if from_thread.future.done():
+            if from_thread.future.get_exception() is not None:
+                return False
+            return from_thread.future.value
+        return self.data_requests.get(from_thread)
 
     def add_thread(self, thread):
         # type: (Union[Thread, Task, StagedTask, TimedTask, ParalelTask]) -> None
@@ -207,17 +461,145 @@ class Controller(object):
 
     def run(self):
         # type: () -> None
-        for thread in self.threads:
+        for thread in self.threads[:]:
             thread.run()
-            if thread in self.data_requests:
-                try:
-                    self.data_requests[thread] = thread.get_return()
-                except:
-                    self.data_requests[thread] = False  # get_return called on Thread, not Task
             if thread.stop:
                 self.threads.remove(thread)
 
 
+class BootProfile(object):
+    # Timeline of the boot phases, written to temp/boot_profile.json once the first frame is on screen.
+    path = "temp/boot_profile.json"
+    origin = None
+    phases = []
+    recording = False
+
+    @staticmethod
+    def start():
+        # type: () -> None
+        BootProfile.origin = monotonic()
+        BootProfile.phases = []
+        BootProfile.recording = True
+
+    @staticmethod
+    @contextmanager
+    def phase(name):
+        # type: (str) -> None
+        start = monotonic()
+        try:
+            yield
+        finally:
+            if BootProfile.recording:
+                BootProfile.add_phase(name, start, monotonic())
+
+    @staticmethod
+    def add_phase(name, start, end):
+        # type: (str, float, float) -> None
+        BootProfile.phases.append({
+            "name": name,
+            "start": round((start - BootProfile.origin) * 1000, 3),
+            "end": round((end - BootProfile.origin) * 1000, 3),
+            "ms": round((end - start) * 1000, 3),
+            "thread": current_thread().name
+        })
+
+    @staticmethod
+    def get_timeline():
+        # type: () -> dict
+        return {
+            "total": round((monotonic() - BootProfile.origin) * 1000, 3),
+            "phases": sorted(BootProfile.phases, key=lambda phase: phase["start"])
+        }
+
+    @staticmethod
+    def finish():
+        # type: () -> dict
+        """Stops recording and writes the timeline."""
+        timeline = BootProfile.get_timeline()
+        BootProfile.recording = False
+        try:
+            profile_file = open(BootProfile.path, "w")
+            json.dump(timeline, profile_file, indent=2)
+            profile_file.close()
+        except:
+            print "Unable to save the boot profile."
+        return timeline
+
+
+class BootLoader(object):
+    # Runs the boot loads on worker threads, each once its dependencies are done, while the main thread keeps the
+    # splash screen's progress bar current. Everything loaded here is also loaded on demand, so a failed task only
+    # means that work is done later.
+    def __init__(self):
+        # type: () -> None
+        self.tasks = OrderedDict()          # type: OrderedDict[str, Tuple[Callable, Tuple[str, ...]]]
+        self.started = set()                # type: Set[str]
+        self.done = set()                   # type: Set[str]
+        self.errors = []                    # type: List[Tuple[str, str]]
+        self.condition = Condition()        # type: Condition
+
+    def add_task(self, name, method, dependencies=()):
+        # type: (str, Callable, Optional[Tuple[str, ...]]) -> BootLoader
+        for dependency in dependencies:
+            if dependency not in self.tasks:
+                raise KeyError("Unknown boot task: " + dependency)
+        self.tasks[name] = (method, tuple(dependencies))
+        return self
+
+    def get_progress(self):
+        # type: () -> float
+        return len(self.done) / float(max(len(self.tasks), 1))
+
+    def start_ready_tasks(self):
+        # type: () -> None
+        # Called with the condition held.
+        for name, (method, dependencies) in self.tasks.items():
+            if name not in self.started and all(dependency in self.done for dependency in dependencies):
+                self.started.add(name)
+                start_new_thread(self.run_task, (name, method))
+
+    def run_task(self, name, method):
+        # type: (str, Callable) -> None
+        current_thread().name = "boot " + name
+        error = None
+        try:
+            with BootProfile.phase(name):
+                method()
+        except:
+            error = format_exc()
+        with self.condition:
+            if error is not None:
+                self.errors.append((name, error))
+            self.done.add(name)
+            self.start_ready_tasks()
+            self.condition.notify_all()
+
+    def start(self):
+        # type: () -> BootLoader
+        """Starts the tasks added so far whose dependencies are done. Tasks may still be added afterwards."""
+        with self.condition:
+            self.start_ready_tasks()
+        return self
+
+    def run(self, on_progress=None):
+        # type: (Optional[Callable[[float], None]]) -> bool
+        """Blocks until every task is done, calling on_progress with the finished fraction on the calling thread."""
+        self.start()
+        shown = -1
+        while shown < len(self.tasks):
+            with self.condition:
+                while len(self.done) == shown:
+                    # Untimed, since a timed wait in Python 2 polls and competes with the tasks for the GIL.
+                    self.condition.wait()
+                shown = len(self.done)
+                progress = self.get_progress()
+            if on_progress is not None:
+                on_progress(progress)
+        for name, error in self.errors:
+            print "Boot task " + name + " failed, it will be retried on demand.\n" + error
+        return len(self.errors) == 0
+
+
 class GUI(object):
     def __init__(self):
         # type: () -> None
@@ -226,21 +608,28 @@ class GUI(object):
         self.orientation = 0                        # type: int
         self.timer = None                           # type: pygame.time.Clock
         self.update_interval = 30                   # type: int
-        pygame.init()
-        if __import__("sys").platform == "linux2":
+        with BootProfile.phase("display mode"):
             info = pygame.display.Info()
-            self.width = info.current_w             # type: int
-            self.height = info.current_h            # type: int
-            screen = pygame.display.set_mode((info.current_w, info.current_h))
-        else:
-            screen = pygame.display.set_mode((240, 320), pygame.HWACCEL)
-            self.width = screen.get_width()         # type: int
-            self.height = screen.get_height()       # type: int
-        try:
-            screen.blit(pygame.image.load("res/splash2.png"), [0, 0])
-        except:
-            screen.blit(pygame.font.Font(None, 20).render("Loading Python OS 6...", 1, (200, 200, 200)), [5, 5])
-        pygame.display.flip()
+            if info.current_w <= 0:
+                # Headless drivers report no screen size and default to 8 bits, which cannot hold the per-pixel
+                # alpha surfaces every container uses.
+                screen = pygame.display.set_mode((240, 320), 0, 32)
+                self.width = screen.get_width()         # type: int
+                self.height = screen.get_height()       # type: int
+            elif __import__("sys").platform == "linux2":
+                self.width = info.current_w             # type: int
+                self.height = info.current_h            # type: int
+                screen = pygame.display.set_mode((info.current_w, info.current_h))
+            else:
+                screen = pygame.display.set_mode((240, 320), pygame.HWACCEL)
+                self.width = screen.get_width()         # type: int
+                self.height = screen.get_height()       # type: int
+        with BootProfile.phase("splash"):
+            try:
+                screen.blit(pygame.image.load("res/splash2.png"), [0, 0])
+            except:
+                screen.blit(pygame.font.Font(None, 20).render("Loading Python OS 6...", 1, (200, 200, 200)), [5, 5])
+            pygame.display.flip()
         __builtin__.screen = screen
         globals()["screen"] = screen
         self.timer = pygame.time.Clock()
@@ -258,6 +647,18 @@ class GUI(object):
                 self.width = 320
                 self.height = 240
             screen = pygame.display.set_mode((self.width, self.height))
+            __builtin__.screen = screen
+            for application in state.get_application_list().get_application_list():
+                if application.loaded:
+                    application.ui.resize(self.width, self.height - 40)
+            state.get_function_bar().resize(self.width, self.height)
+
+    def show_boot_progress(self, progress):
+        # type: (float) -> None
+        bar = pygame.Rect(0, self.height - 4, int(self.width * progress), 4)
+        pygame.draw.rect(screen, state.get_color_palette().get_color("accent"), bar)
+        pygame.display.update(bar)
+        pygame.event.pump()
 
     def repaint(self):
         # type: () -> None
@@ -284,7 +685,7 @@ class GUI(object):
         # type: (Optional[str], Optional[int], Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]]) -> None
         pygame.draw.rect(screen, bgcolor,
                          [0, ((state.get_gui().height - 40) / 2) - size, state.get_gui().width, 2 * size])
-        screen.blit(state.get_font().get(size).render(text, 1, color),
+        screen.blit(state.get_font().render(text, size, color),
                     (5, ((state.get_gui().height - 40) / 2) - size + (size / 4)))
         pygame.display.flip()
 
@@ -294,24 +695,138 @@ class GUI(object):
         return [(larger.width / 2) - (component.width / 2), (larger.height / 2) - (component.height / 2)]
 
     class Font(object):
-        def __init__(self, path="res/RobotoCondensed-Regular.ttf", min_size=10, max_size=30):
-            # type: (Optional[str], Optional[int], Optional[int]) -> None
+        # Every loaded (path, size) pair is shared by all Font instances, least recently used first.
+        loaded = OrderedDict()                  # type: OrderedDict[Tuple[str, int], pygame.font.Font]
+        loaded_lock = Lock()                    # type: Lock
+        max_loaded = 32                         # type: int
+
+        @staticmethod
+        def set_max_loaded(count):
+            # type: (int) -> None
+            with GUI.Font.loaded_lock:
+                GUI.Font.max_loaded = count
+                while len(GUI.Font.loaded) > max(GUI.Font.max_loaded, 0):
+                    GUI.Font.loaded.popitem(False)
+
+        @staticmethod
+        def get_loaded_count():
+            # type: () -> int
+            return len(GUI.Font.loaded)
+
+        def __init__(self, path="res/RobotoCondensed-Regular.ttf"):
+            # type: (Optional[str]) -> None
             self.path = path                    # type: str
-            self.sizes = {}                     # type: Dict[int, pygame.font.Font]
-            curr_size = min_size
-            while curr_size <= max_size:
-                self.sizes[curr_size] = pygame.font.Font(path, curr_size)
-                curr_size += 1
+
+        def preload(self, *sizes):
+            # type: (*int) -> None
+            for size in sizes:
+                self.get(size)
 
         def get(self, size=14):
             # type: (Optional[int]) -> pygame.font.Font
-            if size in self.sizes:
-                return self.sizes[size]
-            return pygame.font.Font(self.path, size)
+            key = (self.path, size)
+            with GUI.Font.loaded_lock:
+                font = GUI.Font.loaded.pop(key, None)
+                if font is None:
+                    font = pygame.font.Font(self.path, size)
+                    while len(GUI.Font.loaded) >= max(GUI.Font.max_loaded, 1):
+                        GUI.Font.loaded.popitem(False)
+                GUI.Font.loaded[key] = font
+            return font
+
+        def render(self, text, size=14, color=(0, 0, 0), antialias=True, cached=True):
+            # type: (str, int, Tuple[int, int, int], bool, bool) -> pygame.Surface
+            """Renders through the shared text cache. The returned surface is shared and must not be drawn on."""
+            if not cached:
+                return self.get(size).render(text, antialias, color)
+            return state.get_text_cache().render(self, size, text, color, antialias)
+
+    class TextCache(object):
+        def __init__(self, max_bytes=2097152):
+            # type: (Optional[int]) -> None
+            self.max_bytes = max_bytes              # type: int
+            self.used_bytes = 0                     # type: int
+            self.surfaces = OrderedDict()           # type: OrderedDict[tuple, pygame.Surface]
+            self.lock = Lock()                      # type: Lock
+            self.hits = 0                           # type: int
+            self.misses = 0                         # type: int
+            self.evictions = 0                      # type: int
+
+        @staticmethod
+        def get_surface_bytes(surface):
+            # type: (pygame.Surface) -> int
+            return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+        def render(self, font, size, text, color, antialias=True):
+            # type: (GUI.Font, int, str, Tuple[int, int, int], bool) -> pygame.Surface
+            key = (font.path, size, text, tuple(color), bool(antialias))
+            with self.lock:
+                surface = self.surfaces.pop(key, None)
+                if surface is not None:
+                    self.surfaces[key] = surface
+                    self.hits += 1
+                    return surface
+                self.misses += 1
+            surface = font.get(size).render(text, antialias, color)
+            surface_bytes = GUI.TextCache.get_surface_bytes(surface)
+            if surface_bytes > self.max_bytes:
+                return surface
+            with self.lock:
+                if key not in self.surfaces:
+                    self.surfaces[key] = surface
+                    self.used_bytes += surface_bytes
+                    self.evict()
+            return surface
+
+        def evict(self):
+            # type: () -> None
+            while self.used_bytes > self.max_bytes and len(self.surfaces) > 0:
+                self.used_bytes -= GUI.TextCache.get_surface_bytes(self.surfaces.popitem(False)[1])
+                self.evictions += 1
+
+        def set_max_bytes(self, max_bytes):
+            # type: (int) -> None
+            with self.lock:
+                self.max_bytes = max_bytes
+                self.evict()
+
+        def clear(self):
+            # type: () -> None
+            with self.lock:
+                self.surfaces.clear()
+                self.used_bytes = 0
+
+        def get_hit_rate(self):
+            # type: () -> float
+            lookups = self.hits + self.misses
+            return (1.0 * self.hits / lookups) if lookups > 0 else 0.0
+
+        def get_stats(self):
+            # type: () -> Dict[str, Union[int, float]]
+            return {
+                "entries": len(self.surfaces),
+                "bytes": self.used_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": self.get_hit_rate()
+            }
 
     class Icons(object):
-        def __init__(self):
+        def __init__(self, max_bytes=1048576):
+            # type: (Optional[int]) -> None
             self.root_path = "res/icons/"
+            self.max_bytes = max_bytes              # type: int
+            self.used_bytes = 0                     # type: int
+            self.loaded = OrderedDict()             # type: OrderedDict[Tuple[str, tuple], pygame.Surface]
+            self.resolved = {}                      # type: Dict[Tuple[str, str], Tuple[str, tuple]]
+            self.lock = Lock()                      # type: Lock
+            self.hits = 0                           # type: int
+            self.misses = 0                         # type: int
+            self.evictions = 0                      # type: int
+            self.atlas_path = "res/icons/atlas/"    # type: str
+            self.atlases = None                     # type: List[Tuple[pygame.Surface, Dict[str, dict]]]
             self.icons = {
                 "menu": "menu.png",
                 "unknown": "unknown.png",
@@ -345,18 +860,258 @@ class GUI(object):
             # type: () -> str
             return self.root_path
 
-        def get_loaded_icon(self, icon, folder=""):
-            # type: (str, Optional[str]) -> pygame.Surface
+        def resolve_icon(self, icon, folder=""):
+            # type: (str, Optional[str]) -> Tuple[str, tuple]
+            # Returns the (path, size) to load, or None for a missing icon. Both outcomes are remembered.
+            key = (icon, folder)
+            if key in self.resolved:
+                return self.resolved[key]
+            resolved = None
+            if icon in self.icons and os.path.exists(os.path.join(self.root_path, str(self.icons[icon]))):
+                resolved = (os.path.join(self.root_path, self.icons[icon]), ())
+            else:
+                for path in (icon, os.path.join("res/icons/", icon), os.path.join(folder, icon)):
+                    if os.path.exists(path):
+                        resolved = (os.path.normpath(path), (40, 40))
+                        break
+            self.resolved[key] = resolved
+            return resolved
+
+        @staticmethod
+        def read_atlas(path):
+            # type: (str) -> Tuple[pygame.Surface, Dict[str, dict]]
+            # The pixels are zlib-compressed RGBA, which decodes several times faster than a PNG of the atlas.
+            if not os.path.exists(path + ".atlas") or not os.path.exists(path + ".json"):
+                return None
             try:
-                return pygame.image.load(os.path.join(self.root_path, self.icons[icon]))
+                index_file = open(path + ".json", "rU")
+                index = json.load(index_file)
+                index_file.close()
+                pixel_file = open(path + ".atlas", "rb")
+                pixels = decompress(pixel_file.read())
+                pixel_file.close()
+                return pygame.image.fromstring(pixels, tuple(index["size"]), "RGBA"), index["icons"]
             except:
-                if os.path.exists(icon):
-                    return pygame.transform.scale(pygame.image.load(icon), (40, 40))
-                if os.path.exists(os.path.join("res/icons/", icon)):
-                    return pygame.transform.scale(pygame.image.load(os.path.join("res/icons/", icon)), (40, 40))
-                if os.path.exists(os.path.join(folder, icon)):
-                    return pygame.transform.scale(pygame.image.load(os.path.join(folder, icon)), (40, 40))
-                return pygame.image.load(os.path.join(self.root_path, self.icons["unknown"]))
+                return None
+
+        @staticmethod
+        def write_atlas(path, entries, width=512):
+            # type: (str, Dict[str, Tuple[pygame.Surface, dict]], Optional[int]) -> None
+            """Shelf-packs the (surface, entry) pairs into path.atlas, with their entries and rects in path.json."""
+            if len(entries) == 0:
+                for extension in (".atlas", ".json"):
+                    if os.path.exists(path + extension):
+                        os.remove(path + extension)
+                return
+            x = 0
+            y = 0
+            shelf_height = 0
+            rects = {}
+            for key in sorted(entries.keys(), key=lambda k: (-entries[k][0].get_height(), k)):
+                icon_width, icon_height = entries[key][0].get_size()
+                if x + icon_width > width:
+                    x = 0
+                    y += shelf_height
+                    shelf_height = 0
+                rects[key] = pygame.Rect(x, y, icon_width, icon_height)
+                x += icon_width
+                shelf_height = max(shelf_height, icon_height)
+            atlas = pygame.Surface((width, y + shelf_height), pygame.SRCALPHA)
+            atlas.fill((0, 0, 0, 0))
+            index = {}
+            for key in rects:
+                atlas.blit(entries[key][0], rects[key], None, pygame.BLEND_RGBA_MAX)
+                index[key] = dict(entries[key][1], rect=list(rects[key]))
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            pixel_file = open(path + ".atlas", "wb")
+            pixel_file.write(compress(pygame.image.tostring(atlas, "RGBA"), 1))
+            pixel_file.close()
+            GUI.Icons.write_index(path, atlas.get_size(), index)
+
+        @staticmethod
+        def write_index(path, size, index):
+            # type: (str, Tuple[int, int], Dict[str, dict]) -> None
+            index_file = open(path + ".json", "w")
+            json.dump({"size": list(size), "icons": index}, index_file, sort_keys=True)
+            index_file.close()
+
+        @staticmethod
+        def validate_index(index):
+            # type: (Dict[str, dict]) -> bool
+            """Drops the entries whose source file changed since packing. Returns whether the index changed.
+
+            A checkout does not keep mtimes, so an entry whose size matches but whose mtime differs is settled by
+            the file's CRC. When the contents match, the entry takes the new mtime so that the next boot only needs
+            a stat.
+            """
+            changed = False
+            for key, entry in index.items():
+                try:
+                    stat = os.stat(key)
+                except OSError:
+                    stat = None
+                same_size = stat is not None and stat.st_size == entry["bytes"]
+                if same_size and stat.st_mtime == entry.get("mtime"):
+                    continue
+                if same_size and GUI.Icons.get_file_crc(key) == entry.get("crc"):
+                    entry["mtime"] = stat.st_mtime
+                else:
+                    del index[key]
+                changed = True
+            return changed
+
+        def load_atlases(self):
+            # type: () -> None
+            # Every entry is checked against its file here, once, so that looking an icon up needs no file access.
+            atlases = []
+            for name in ("system", "apps"):
+                path = os.path.join(self.atlas_path, name)
+                atlas = GUI.Icons.read_atlas(path)
+                if atlas is None:
+                    continue
+                if GUI.Icons.validate_index(atlas[1]):
+                    try:
+                        GUI.Icons.write_index(path, atlas[0].get_size(), atlas[1])
+                    except (IOError, OSError):
+                        pass
+                atlases.append(atlas)
+            self.atlases = atlases
+
+        def preload(self):
+            # type: () -> None
+            with self.lock:
+                if self.atlases is None:
+                    self.load_atlases()
+
+        @staticmethod
+        def get_file_crc(path):
+            # type: (str) -> int
+            icon_file = open(path, "rb")
+            crc = crc32(icon_file.read()) & 0xffffffff
+            icon_file.close()
+            return crc
+
+        @staticmethod
+        def get_file_entry(path, size=()):
+            # type: (str, Optional[tuple]) -> dict
+            """The atlas index entry for the icon file at path, scaled to size, without its rect."""
+            return {"bytes": os.path.getsize(path), "mtime": os.path.getmtime(path),
+                    "crc": GUI.Icons.get_file_crc(path), "size": list(size)}
+
+        def get_atlas_icon(self, path, size=()):
+            # type: (str, Optional[tuple]) -> Tuple[pygame.Surface, tuple]
+            # Entries whose source file changed before the atlases were loaded have been dropped by validate_index.
+            with self.lock:
+                if self.atlases is None:
+                    self.load_atlases()
+                atlases = self.atlases
+            key = os.path.normpath(path)
+            for surface, index in atlases:
+                entry = index.get(key)
+                if entry is not None and tuple(entry["size"]) in ((), size):
+                    return surface.subsurface(pygame.Rect(entry["rect"])), tuple(entry["size"])
+            return None, ()
+
+        def update_app_atlas(self, add=(), remove_folder=None):
+            # type: (Optional[List[Tuple[str, tuple]]], Optional[str]) -> None
+            """Repacks the app icon atlas with the (path, size) icons in add and without those under remove_folder."""
+            path = os.path.join(self.atlas_path, "apps")
+            entries = {}
+            existing = GUI.Icons.read_atlas(path)
+            if existing is not None:
+                for key, entry in existing[1].items():
+                    if remove_folder is None or not key.startswith(os.path.normpath(remove_folder) + os.sep):
+                        entries[key] = (existing[0].subsurface(pygame.Rect(entry["rect"])).copy(), entry)
+            for icon_path, size in add:
+                surface = pygame.image.load(icon_path)
+                if size != ():
+                    surface = pygame.transform.scale(surface, size)
+                entries[os.path.normpath(icon_path)] = (surface, GUI.Icons.get_file_entry(icon_path, size))
+            GUI.Icons.write_atlas(path, entries)
+            with self.lock:
+                self.atlases = None
+
+        def add_app_icon(self, icon, folder):
+            # type: (str, str) -> None
+            resolved = self.resolve_icon(icon, folder)
+            if resolved is not None and not resolved[0].startswith(os.path.normpath(self.root_path) + os.sep):
+                self.update_app_atlas(add=[resolved])
+
+        def load_icon(self, path, size=(), mtime=None):
+            # type: (str, Optional[tuple], Optional[float]) -> pygame.Surface
+            # With an mtime, it is part of the key and entries for older versions of the file are dropped.
+            key = (path, size) if mtime is None else (path, size, mtime)
+            with self.lock:
+                surface = self.loaded.pop(key, None)
+                if surface is not None:
+                    self.loaded[key] = surface
+                    self.hits += 1
+                    return surface
+                self.misses += 1
+            surface, atlas_size = self.get_atlas_icon(path, size)
+            if surface is None:
+                surface = pygame.image.load(path)
+            if size != atlas_size:
+                surface = pygame.transform.scale(surface, size)
+            surface_bytes = GUI.TextCache.get_surface_bytes(surface)
+            with self.lock:
+                if mtime is not None:
+                    for stale in [k for k in self.loaded.keys() if k[:2] == key[:2] and k != key]:
+                        self.used_bytes -= GUI.TextCache.get_surface_bytes(self.loaded.pop(stale))
+                if key not in self.loaded and surface_bytes <= self.max_bytes:
+                    self.loaded[key] = surface
+                    self.used_bytes += surface_bytes
+                    while self.used_bytes > self.max_bytes:
+                        self.used_bytes -= GUI.TextCache.get_surface_bytes(self.loaded.popitem(False)[1])
+                        self.evictions += 1
+            return surface
+
+        def load_image(self, path):
+            # type: (str) -> pygame.Surface
+            """Loads any image file through the cache, again if it changed since. The surface must not be drawn on."""
+            return self.load_icon(path, (), os.path.getmtime(path))
+
+        def get_loaded_icon(self, icon, folder=""):
+            # type: (str, Optional[str]) -> pygame.Surface
+            """The returned surface is shared and must not be drawn on."""
+            resolved = self.resolve_icon(icon, folder)
+            if resolved is not None:
+                try:
+                    return self.load_icon(*resolved)
+                except:
+                    self.resolved[(icon, folder)] = None
+            return self.load_icon(os.path.join(self.root_path, self.icons["unknown"]))
+
+        def invalidate(self, folder=None):
+            # type: (Optional[str]) -> None
+            """Forgets icons resolved for or loaded from folder, or everything when it is None."""
+            with self.lock:
+                self.atlases = None
+                if folder is None:
+                    self.resolved.clear()
+                    self.loaded.clear()
+                    self.used_bytes = 0
+                    return
+                folder = os.path.normpath(folder)
+                for key in self.resolved.keys():
+                    if os.path.normpath(key[1]) == folder:
+                        del self.resolved[key]
+                for key in self.loaded.keys():
+                    if key[0].startswith(folder + os.sep):
+                        self.used_bytes -= GUI.TextCache.get_surface_bytes(self.loaded.pop(key))
+
+        def get_stats(self):
+            # type: () -> Dict[str, int]
+            return {
+                "entries": len(self.loaded),
+                "bytes": self.used_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "missing": len([key for key in self.resolved if self.resolved[key] is None])
+            }
 
         @staticmethod
         def load_from_file(path):
@@ -577,43 +1332,46 @@ class GUI(object):
                 self.surface = data["surface"]
                 if "width" in data or "height" in data:
                     if "width" in data:
-                        if type(data["width"]) == str and data["width"].endswith("%"):
-                            self.width = int(
-                                (state.get_active_application().ui.width / 100) * int(data["width"].replace("%", "")))
-                        else:
-                            self.width = data["width"]
+                        self.width = GUI.Component.resolve_length(data["width"], state.get_active_application().ui.width)
                         if "height" not in data:
                             self.height = self.surface.get_height()
                     if "height" in data:
-                        if type(data["height"]) == str and data["height"].endswith("%"):
-                            self.height = int(
-                                (state.get_active_application().ui.height / 100) * int(data["height"].replace("%", "")))
-                        else:
-                            self.height = data["height"]
+                        self.height = GUI.Component.resolve_length(data["height"],
+                                                                   state.get_active_application().ui.height)
                         if self.width == -1:
                             self.width = self.surface.get_width()
-                    self.surface = pygame.transform.scale(self.surface, (self.width, self.height))
+                    if self.surface.get_size() != (self.width, self.height):
+                        self.surface = pygame.transform.scale(self.surface, (self.width, self.height))
                 else:
                     self.width = self.surface.get_width()
                     self.height = self.surface.get_height()
             else:
-                if "width" in data and type(data["width"]) == str and data["width"].endswith("%"):
-                    self.width = int(
-                        (state.get_active_application().ui.width / 100.0) * int(data["width"].replace("%", "")))
+                if GUI.Component.is_relative(data.get("width")):
+                    self.width = GUI.Component.resolve_length(data["width"], state.get_active_application().ui.width)
                 else:
                     self.width = data.get("width", 0)
-                if "height" in data and type(data["height"]) == str and data["height"].endswith("%"):
-                    self.height = int(
-                        (state.get_active_application().ui.height / 100.0) * int(data["height"].replace("%", "")))
+                if GUI.Component.is_relative(data.get("height")):
+                    self.height = GUI.Component.resolve_length(data["height"], state.get_active_application().ui.height)
                 else:
                     self.height = data.get("height", 0)
                 self.surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-            if type(self.position[0]) == str and self.position[0].endswith("%"):
-                self.position[0] = int(
-                    (state.get_active_application().ui.width / 100.0) * int(self.position[0].replace("%", "")))
-            if type(self.position[1]) == str and self.position[1].endswith("%"):
-                self.position[1] = int(
-                    (state.get_active_application().ui.height / 100.0) * int(self.position[1].replace("%", "")))
+            # The rules as given are kept, so percentages can be resolved again when the app's area changes.
+            self.layout_rules = {"position": list(position)[:], "width": data.get("width"),
+                                 "height": data.get("height")}          # type: Dict[str, Any]
+            self.relative = False                                       # type: bool
+            self.flex = data.get("flex", 0)                             # type: int
+            self.layout_size = None                                     # type: Tuple[int, int]
+            self.layout_dirty = False                                   # type: bool
+            self.update_relative()
+            if self.relative:
+                self.layout_size = (state.get_active_application().ui.width,
+                                    state.get_active_application().ui.height)
+            if GUI.Component.is_relative(self.position[0]):
+                self.position[0] = GUI.Component.resolve_length(self.position[0],
+                                                                state.get_active_application().ui.width)
+            if GUI.Component.is_relative(self.position[1]):
+                self.position[1] = GUI.Component.resolve_length(self.position[1],
+                                                                state.get_active_application().ui.height)
             self.event_bindings["onClick"] = data.get("onClick", None)
             self.event_bindings["onLongClick"] = data.get("onLongClick", None)
             self.event_bindings["onIntermediateUpdate"] = data.get("onIntermediateUpdate", None)
@@ -703,6 +1461,79 @@ class GUI(object):
         def set_position(self, pos):
             # type: (Sequence[int, int]) -> None
             self.position = list(pos)[:]
+            self.layout_rules["position"] = self.position[:]
+
+        @staticmethod
+        def is_relative(value):
+            # type: (Any) -> bool
+            return isinstance(value, str) and value.endswith("%")
+
+        @staticmethod
+        def resolve_length(value, total):
+            # type: (Union[int, str], int) -> int
+            if GUI.Component.is_relative(value):
+                return int((total / 100.0) * int(value.replace("%", "")))
+            return value
+
+        def update_relative(self):
+            # type: () -> None
+            rules = self.layout_rules
+            self.relative = (GUI.Component.is_relative(rules["position"][0]) or
+                             GUI.Component.is_relative(rules["position"][1]) or
+                             GUI.Component.is_relative(rules["width"]) or GUI.Component.is_relative(rules["height"]))
+
+        def set_layout(self, **rules):
+            # type: (...) -> None
+            # Takes position, width, height and flex, in the same form as the constructor.
+            # Fixed values apply at once, percentages on the next layout.
+            if "flex" in rules:
+                self.flex = rules.pop("flex")
+            if "position" in rules:
+                rules["position"] = list(rules["position"])[:]
+                for axis in (0, 1):
+                    if not GUI.Component.is_relative(rules["position"][axis]):
+                        self.position[axis] = rules["position"][axis]
+            self.layout_rules.update(rules)
+            self.update_relative()
+            self.set_size(rules["width"] if not GUI.Component.is_relative(rules.get("width", "%")) else self.width,
+                          rules["height"] if not GUI.Component.is_relative(rules.get("height", "%")) else self.height)
+            self.invalidate_layout()
+
+        def invalidate_layout(self):
+            # type: () -> None
+            self.layout_dirty = True
+
+        def layout(self, width, height):
+            # type: (int, int) -> None
+            # Percentages are shares of the app's area (width, height). The result is kept until that area or
+            # the rules change, so unchanged components are skipped.
+            if self.layout_dirty or (self.relative and self.layout_size != (width, height)):
+                self.measure(width, height)
+            self.layout_size = (width, height)
+            self.layout_dirty = False
+
+        def measure(self, width, height):
+            # type: (int, int) -> None
+            # Only the relative rules are resolved; fixed ones may have been changed directly since.
+            rules = self.layout_rules
+            for axis, total in ((0, width), (1, height)):
+                if GUI.Component.is_relative(rules["position"][axis]):
+                    self.position[axis] = GUI.Component.resolve_length(rules["position"][axis], total)
+            self.set_size(GUI.Component.resolve_length(rules["width"], width)
+                          if GUI.Component.is_relative(rules["width"]) else self.width,
+                          GUI.Component.resolve_length(rules["height"], height)
+                          if GUI.Component.is_relative(rules["height"]) else self.height)
+
+        def set_size(self, width, height):
+            # type: (int, int) -> None
+            if (width, height) != (self.width, self.height):
+                self.width = width
+                self.height = height
+                self.on_resize()
+
+        def on_resize(self):
+            # type: () -> None
+            self.refresh()
 
         @staticmethod
         def default(*items):
@@ -726,6 +1557,8 @@ class GUI(object):
             self.skip_child_check = False                       # type: bool
             self.transparent = data.get("transparent", False)
             self.background_color = data.get("color", state.get_color_palette().get_color("background"))
+            self.direction = data.get("direction", None)                # type: str
+            self.spacing = data.get("spacing", 0)                       # type: int
             if "children" in data:
                 self.child_components = data["children"]
 
@@ -741,12 +1574,25 @@ class GUI(object):
         def remove_child(self, component):
             # type: (GUI.Component) -> None
             self.child_components.remove(component)
+            GUI.Container.release_child(component)
+
+        def remove_children(self, *children):
+            # type: (Tuple[GUI.Component, ...]) -> None
+            for child in children:
+                self.remove_child(child)
 
         def clear_children(self):
             for component in self.child_components:
-                self.remove_child(component)
+                GUI.Container.release_child(component)
             del self.child_components[:]
 
+        @staticmethod
+        def release_child(component):
+            # type: (GUI.Component) -> None
+            # Children holding an open file and a background indexer are closed once they leave the tree.
+            if isinstance(component, GUI.MappedTextScrollableContainer):
+                component.close()
+
         def get_clicked_child(self, mouse_event, offset_x=0, offset_y=0):
             curr_child = len(self.child_components)
             while curr_child > 0:
@@ -771,6 +1617,41 @@ class GUI(object):
                 return self
             return None
 
+        def layout(self, width, height):
+            # type: (int, int) -> None
+            super(GUI.Container, self).layout(width, height)
+            for child in self.child_components:
+                child.layout(width, height)
+            self.arrange()
+
+        def arrange(self):
+            # type: () -> None
+            # With a "row" or "column" direction, children are placed one after another along it. Children with a
+            # flex weight share whatever space the others leave, in proportion to their weights.
+            if self.direction not in ("row", "column"):
+                return
+            axis = 0 if self.direction == "row" else 1
+            children = self.child_components
+            flex_total = sum(child.flex for child in children)
+            used = sum(child.width if axis == 0 else child.height for child in children if child.flex == 0)
+            free = max(0, (self.width if axis == 0 else self.height) - used - (self.spacing * (len(children) - 1)))
+            pos = 0
+            for child in children:
+                if child.flex > 0:
+                    size = (free * child.flex) / flex_total
+                    if axis == 0:
+                        child.set_size(size, child.height)
+                    else:
+                        child.set_size(child.width, size)
+                    if isinstance(child, GUI.Container):
+                        child.arrange()
+                child.position[axis] = pos
+                pos += (child.width if axis == 0 else child.height) + self.spacing
+
+        def on_resize(self):
+            # type: () -> None
+            self.refresh(False)
+
         def get_child_at(self, position):
             # type: (Tuple[int, int]) -> GUI.Component
             for child in self.child_components:
@@ -804,6 +1685,12 @@ class GUI(object):
             self.dialog_screen_freezes = []                   # type: List[pygame.Surface, ...]
             self.dialog_components_freezes = []               # type: List[GUI.Component, ...]
 
+        def resize(self, width, height):
+            # type: (int, int) -> None
+            # Runs a layout pass against the new area. Only components with relative rules are measured again.
+            self.set_size(width, height)
+            self.layout(width, height)
+
         def set_dialog(self, dialog):
             # type: (GUI.Dialog) -> None
             self.dialogs.insert(0, dialog)
@@ -836,13 +1723,15 @@ class GUI(object):
             self.size = size                                # type: int
             self.color = color                              # type: Union[Tuple[int, int, int], int, str]
             self.font = data.get("font", state.get_font())   # type: pygame.font.Font
+            # Text that changes on every keystroke would only churn the shared cache.
+            self.cached = data.get("cached", True)          # type: bool
             self.refresh()
-            data["surface"] = self.get_rendered_text()
+            data["surface"] = self.surface
             super(GUI.Text, self).__init__(position, **data)
 
         def get_rendered_text(self):
             # type: () -> pygame.Surface
-            return self.font.get(self.size).render(str(self.text), 1, self.color)
+            return self.font.render(str(self.text), self.size, self.color, cached=self.cached)
 
         def refresh(self):
             # type: () -> None
@@ -850,6 +1739,14 @@ class GUI(object):
             self.width = self.surface.get_width()
             self.height = self.surface.get_height()
 
+        def render(self, larger_surface):
+            # type: (pygame.Surface) -> None
+            # The surface may be shared through the text cache, so the border is drawn on the larger surface.
+            larger_surface.blit(self.surface, self.position)
+            if self.border > 0:
+                pygame.draw.rect(larger_surface, self.border_color,
+                                 [self.position[0], self.position[1], self.width, self.height], self.border)
+
         def set_text(self, text):
             # type: (str) -> None
             self.text = str(text)
@@ -859,52 +1756,132 @@ class GUI(object):
             # type: (tuple) -> int
             return new_dimensions[1] * (self.size / self.height)
 
+    class TextWrapper(object):
+        wrappers = WeakKeyDictionary()                     # type: Dict[pygame.font.Font, GUI.TextWrapper]
+
+        @staticmethod
+        def get(font):
+            # type: (pygame.font.Font) -> GUI.TextWrapper
+            wrapper = GUI.TextWrapper.wrappers.get(font)
+            if wrapper is None:
+                wrapper = GUI.TextWrapper(font)
+                GUI.TextWrapper.wrappers[font] = wrapper
+            return wrapper
+
+        def __init__(self, font, max_words=4096):
+            # type: (pygame.font.Font, Optional[int]) -> None
+            self.font_ref = ref(font)                       # type: Callable[[], pygame.font.Font]
+            self.max_words = max_words                      # type: int
+            self.widths = {}                                # type: Dict[str, int]
+            self.old_widths = {}                            # type: Dict[str, int]
+            self.evictions = 0                              # type: int
+            self.space_width = font.size(" ")[0]            # type: int
+            self.line_height = font.size("")[1]             # type: int
+            self.last_string = None                         # type: str
+            self.last_paragraphs = []                       # type: List[List[str], List[int]]
+
+        def measure(self, word):
+            # type: (str) -> int
+            # The cache is kept in two generations of up to max_words / 2 each, as reordering an OrderedDict on every
+            # hit costs more than measuring. Words used again are moved to the current one, and whatever is left in
+            # the old one when the current one fills has not been used for a whole generation and is dropped.
+            width = self.widths.get(word)
+            if width is not None:
+                return width
+            width = self.old_widths.pop(word, None)
+            if width is None:
+                width = self.font_ref().size(word)[0]
+            if len(self.widths) >= self.max_words / 2:
+                self.evictions += len(self.old_widths)
+                self.old_widths = self.widths
+                self.widths = {}
+            self.widths[word] = width
+            return width
+
+        def get_word_count(self):
+            # type: () -> int
+            return len(self.widths) + len(self.old_widths)
+
+        def split(self, string):
+            # type: (str) -> List[Tuple[List[str], List[int]]]
+            if string != self.last_string:
+                paragraphs = []
+                measure = self.measure
+                for requested_line in string.splitlines():
+                    known = self.widths
+                    words = requested_line.split(" ")
+                    paragraphs.append((words, [known[word] if word in known else measure(word) for word in words]))
+                self.last_string = string
+                self.last_paragraphs = paragraphs
+            return self.last_paragraphs
+
+        def wrap(self, string, width):
+            # type: (str, int) -> Tuple[List[Tuple[str, int]], bool]
+            """Returns the (line, pixel width) pairs and whether any single word was wider than the width."""
+            lines = []
+            too_long = False
+            space = self.space_width
+            for words, widths in self.split(string):
+                if sum(widths) + space * (len(words) - 1) <= width:
+                    lines.append((" ".join(words), sum(widths) + space * (len(words) - 1)))
+                    continue
+                line_start = 0
+                line_width = 0
+                i = 0
+                for word_width in widths:
+                    if word_width >= width:
+                        too_long = True
+                    if i > line_start and line_width + word_width + space >= width:
+                        lines.append((" ".join(words[line_start:i]), line_width - space))
+                        line_start = i
+                        line_width = 0
+                    line_width += word_width + space
+                    i += 1
+                lines.append((" ".join(words[line_start:]), line_width - space))
+            return lines, too_long
+
     class MultiLineText(Text):
         @staticmethod
-        def render_textrect(string, font, rect, text_color, background_color, justification):
-            # type: (str, pygame.font.Font, pygame.Rect, Tuple[int, int, int], Tuple[int, int, int], int) -> None
-            final_lines = []
-            requested_lines = string.splitlines()
-            err = None
-            for requested_line in requested_lines:
-                if font.size(requested_line)[0] > rect.width:
-                    words = requested_line.split(' ')
-                    for word in words:
-                        if font.size(word)[0] >= rect.width:
-                            print
-                            "The word '" + word + "' is too long to fit in the rect passed."
-                            err = 0
-                    accumulated_line = ""
-                    for word in words:
-                        test_line = accumulated_line + word + " "
-                        if font.size(test_line)[0] < rect.width:
-                            accumulated_line = test_line
-                        else:
-                            final_lines.append(accumulated_line)
-                            accumulated_line = word + " "
-                    final_lines.append(accumulated_line)
-                else:
-                    final_lines.append(requested_line)
-            surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        def render_lines(lines, font, size, text_color, background_color, justification):
+            # type: (List[Tuple[str, int]], pygame.font.Font, Tuple[int, int], Tuple[int, int, int], Tuple[int, int, int], int) -> pygame.Surface
+            surface = pygame.Surface(size, pygame.SRCALPHA)
             surface.fill(background_color)
+            # Lines never overlap, so on a transparent background they are copied rather than alpha-blended,
+            # which is several times faster and keeps the glyph edges' color.
+            flags = pygame.BLEND_RGBA_MAX if len(background_color) == 4 and background_color[3] == 0 else 0
+            line_height = GUI.TextWrapper.get(font).line_height
             accumulated_height = 0
-            for line in final_lines:
-                if accumulated_height + font.size(line)[1] >= rect.height:
-                    err = 1
+            for line, line_width in lines:
+                if accumulated_height >= size[1]:
+                    break
                 if line != "":
                     tempsurface = font.render(line, 1, text_color)
-                    if justification == 0:
-                        surface.blit(tempsurface, (0, accumulated_height))
-                    elif justification == 1:
-                        surface.blit(tempsurface, ((rect.width - tempsurface.get_width()) / 2, accumulated_height))
+                    if justification == 1:
+                        surface.blit(tempsurface, ((size[0] - line_width) / 2, accumulated_height), None, flags)
                     elif justification == 2:
-                        surface.blit(tempsurface, (rect.width - tempsurface.get_width(), accumulated_height))
+                        surface.blit(tempsurface, (size[0] - line_width, accumulated_height), None, flags)
                     else:
-                        print
-                        "Invalid justification argument: " + str(justification)
-                        err = 2
-                accumulated_height += font.size(line)[1]
-            return (surface, err, final_lines)
+                        surface.blit(tempsurface, (0, accumulated_height), None, flags)
+                accumulated_height += line_height
+            return surface
+
+        @staticmethod
+        def render_textrect(string, font, rect, text_color, background_color, justification):
+            # type: (str, pygame.font.Font, pygame.Rect, Tuple[int, int, int], Tuple[int, int, int], int) -> None
+            err = None
+            wrapper = GUI.TextWrapper.get(font)
+            final_lines, too_long = wrapper.wrap(string, rect.width)
+            if too_long:
+                print "A word is too long to fit in the rect passed."
+                err = 0
+            if len(final_lines) * wrapper.line_height >= rect.height:
+                err = 1
+            if justification not in (0, 1, 2):
+                print "Invalid justification argument: " + str(justification)
+                err = 2
+            surface = GUI.MultiLineText.render_lines(final_lines, font, rect.size, text_color, background_color,
+                                                     justification)
+            return (surface, err, [line[0] for line in final_lines])
 
         def __init__(self, position, text, color=DEFAULT, size=DEFAULT, justification=DEFAULT, **data):
             # type: (Tuple[int, int], str, Optional[int], Optiona[int], Optional[int], ...) -> None
@@ -914,10 +1891,11 @@ class GUI(object):
             self.justification = justification              # type: int
             self.color = color                              # type: Tuple[int, int, int]
             self.size = size                                # type: int
-            # super(GUI.Text, self).__init__(position, **data)
+            # The text is laid out before Component.__init__ runs, so the box is known up front.
+            self.position = list(position)[:]               # type: List[int, int]
+            self.width = min(data.pop("width", state.get_gui().width), state.get_gui().width)     # type: int
+            self.height = data.pop("height", 0)                                                   # type: int
             super(GUI.MultiLineText, self).__init__(position, text, color, size, **data)
-            if self.width > state.get_gui().width:
-                self.width = state.get_gui().width
 
         def get_rendered_text(self):
             # type: () -> pygame.Surface
@@ -942,40 +1920,63 @@ class GUI(object):
             self.line_height = line_height                          # type: int
             self.linked_scroller = data.get("scroller", None)       # type: GUI.Component
             self.text_lines = []                                    # type: List[str, ...]
+            self.min_height = data.get("height", 0)                 # type: int
             super(GUI.ExpandingMultiLineText, self).__init__(position, text, color, size, justification, **data)
-            self.refresh()
 
-        def get_rendered_rext(self):
-            # type: () -> pygame.Surface
-            fits = False
-            surf = None
-            while not fits:
-                d = GUI.MultiLineText.render_textrect(self.text, self.font.get(self.size),
-                                                      pygame.Rect(self.position[0], self.position[1], self.width,
-                                                                  self.height),
-                                                      self.color, (0, 0, 0, 0), self.justification)
-                surf = d[0]
-                fits = d[1] != 1
-                self.text_lines = d[2]
-                if not fits:
-                    self.height += self.line_height
+        def refresh(self):
+            # type: () -> None
+            # Wraps once, sizes the surface to fit every line, rasterizes once and tells the scroller once.
+            font = self.font.get(self.size)
+            lines = GUI.TextWrapper.get(font).wrap(self.text, self.width)[0]
+            self.text_lines = [line[0] for line in lines]
+            self.height = max(self.min_height, len(lines) * GUI.TextWrapper.get(font).line_height)
+            self.surface = GUI.MultiLineText.render_lines(lines, font, (self.width, self.height), self.color,
+                                                          (0, 0, 0, 0), self.justification)
             if self.linked_scroller is not None:
                 self.linked_scroller.refresh(False)
-            return surf
 
     class Image(Component):
+        # Scaled variants of every source surface, shared by all images showing it.
+        scaled = WeakKeyDictionary()            # type: Dict[pygame.Surface, Dict[tuple, pygame.Surface]]
+        scaled_lock = Lock()                    # type: Lock
+
+        @staticmethod
+        def get_scaled(surface, size, smooth=False):
+            # type: (pygame.Surface, Tuple[int, int], Optional[bool]) -> pygame.Surface
+            """The returned surface is shared and must not be drawn on."""
+            size = (int(size[0]), int(size[1]))
+            if surface.get_size() == size:
+                return surface
+            smooth = smooth and surface.get_bitsize() in (24, 32)
+            key = (size[0], size[1], smooth)
+            with GUI.Image.scaled_lock:
+                variants = GUI.Image.scaled.get(surface)
+                if variants is not None and key in variants:
+                    return variants[key]
+            if smooth:
+                scaled = pygame.transform.smoothscale(surface, size)
+            else:
+                scaled = pygame.transform.scale(surface, size)
+            with GUI.Image.scaled_lock:
+                GUI.Image.scaled.setdefault(surface, {})[key] = scaled
+            return scaled
+
         def __init__(self, position, **data):
             # type: (Tuple[int, int], Optional[Dict[str, Any], ...]) -> None
             self.path = ""                      # type: str
             self.originalSurface = None         # type: pygame.Surface
             self.transparent = True             # type: bool
+            self.smooth = data.get("smooth", False)     # type: bool
             if "path" in data:
                 self.path = data["path"]
             else:
                 self.path = "surface"
             if "surface" not in data:
-                data["surface"] = pygame.image.load(data["path"])
+                data["surface"] = state.get_icons().load_image(data["path"])
             self.originalSurface = data["surface"]
+            if isinstance(data.get("width"), int) and isinstance(data.get("height"), int):
+                data["surface"] = GUI.Image.get_scaled(self.originalSurface, (data["width"], data["height"]),
+                                                       self.smooth)
             super(GUI.Image, self).__init__(position, **data)
 
         def set_image(self, **data):
@@ -985,7 +1986,7 @@ class GUI(object):
             else:
                 self.path = "surface"
             if "surface" not in data:
-                data["surface"] = pygame.image.load(data["path"])
+                data["surface"] = state.get_icons().load_image(data["path"])
             self.originalSurface = data["surface"]
             if data.get("resize", False):
                 self.width = self.originalSurface.get_width()
@@ -994,12 +1995,15 @@ class GUI(object):
 
         def refresh(self):
             # type: () -> None
-            super(GUI.Image, self).refresh()
-            self.surface = pygame.transform.scale(self.originalSurface, (self.width, self.height))
+            self.surface = GUI.Image.get_scaled(self.originalSurface, (self.width, self.height), self.smooth)
 
         def render(self, larger_surface):
             # type: (pygame.Surface) -> None
-            super(GUI.Image, self).render(larger_surface)
+            # The surface may be a shared icon, so the border is drawn on the larger surface.
+            larger_surface.blit(self.surface, self.position)
+            if self.border > 0:
+                pygame.draw.rect(larger_surface, self.border_color,
+                                 [self.position[0], self.position[1], self.width, self.height], self.border)
 
     class Slider(Component):
         def __init__(self, position, initial_pct=0, **data):
@@ -1222,14 +2226,16 @@ class GUI(object):
             self.lastBlink = datetime.now()
             self.indicator_position = len(initial_text)
             self.indicator_px_position = 0
+            self.advances = array("l", [0])     # type: array
+            self.indexed_text = None            # type: str
             super(GUI.TextEntryField, self).__init__(position, **data)
             self.skip_child_check = True
-            self.text_component = GUI.Text((2, 0), initial_text, data["textColor"], 16, font=state.get_typing_font())
+            self.text_component = GUI.Text((2, 0), initial_text, data["textColor"], 16, font=state.get_typing_font(),
+                                           cached=False)
             self.update_overflow()
             self.last_click_coord = None
             self.text_component.position[1] = GUI.get_centered_coordinates(self.text_component, self)[1]
             self.add_child(self.text_component)
-            self.multiline = None
             self.internal_click_overrides["onClick"] = (self.activate, ())
             self.internal_click_overrides["onIntermediateUpdate"] = (self.drag_scroll, ())
 
@@ -1248,36 +2254,52 @@ class GUI(object):
                     self.text_component.position[0] = 2
             self.last_click_coord = self.inner_click_coordinates
 
+        def index_text(self, start=0):
+            # type: (int) -> None
+            # advances[i] is the pixel width of text[:i]; everything before start is kept.
+            text = self.text_component.text
+            wrapper = GUI.TextWrapper.get(self.text_component.font.get(self.text_component.size))
+            start = min(start, len(self.advances) - 1, len(text))
+            if self.indexed_text is None or self.indexed_text[:start] != text[:start]:
+                start = 0
+            del self.advances[start + 1:]
+            total = self.advances[start]
+            for char in text[start:]:
+                total += wrapper.measure(char)
+                self.advances.append(total)
+            self.indexed_text = text
+
         def get_px_position(self, from_pos=DEFAULT):
             # type: (int) -> int
-            return state.get_typing_font().get(16).render(
-                self.text_component.text[:(self.indicator_position if from_pos == DEFAULT else from_pos)], 1,
-                self.text_component.color).get_width()
+            if self.indexed_text != self.text_component.text:
+                self.index_text()
+            position = self.indicator_position if from_pos == DEFAULT else from_pos
+            return self.advances[max(min(position, len(self.advances) - 1), 0)]
+
+        def get_index_at(self, px_position):
+            # type: (int) -> int
+            if self.indexed_text != self.text_component.text:
+                self.index_text()
+            index = bisect_left(self.advances, px_position)
+            if index >= len(self.advances):
+                return len(self.advances) - 1
+            if index > 0 and px_position - self.advances[index - 1] < self.advances[index] - px_position:
+                return index - 1
+            return index
 
         def activate(self):
             # type: () -> GUI.TextEntryField
             self.clear_scroll_params()
             self.update_overflow()
             state.set_keyboard(GUI.Keyboard(self))
-            if self.multiline is not None:
-                for f in self.multiline.textFields:
-                    f.do_blink = False
             self.do_blink = True
             mouse_pos = self.inner_click_coordinates[0] - self.inner_offset[0]
             if mouse_pos > self.text_component.width:
                 self.indicator_position = len(self.text_component.text)
             else:
-                prev_width = 0
-                for self.indicator_position in range(len(self.text_component.text)):
-                    curr_width = self.get_px_position(self.indicator_position)
-                    if mouse_pos >= prev_width and mouse_pos <= curr_width:
-                        self.indicator_position -= 1
-                        break
-                    prev_width = curr_width
+                self.indicator_position = self.get_index_at(mouse_pos)
             state.get_keyboard().active = True
             self.indicator_px_position = self.get_px_position()
-            if self.multiline:
-                self.multiline.set_current(self)
             return self
 
         def update_overflow(self):
@@ -1297,21 +2319,9 @@ class GUI(object):
                                            :self.indicator_position] + char + self.text_component.text[
                                                                              self.indicator_position:]
             self.text_component.refresh()
+            self.index_text(self.indicator_position)
             self.indicator_position += len(char)
             self.update_overflow()
-            if self.multiline is not None:
-                if self.overflow > 0:
-                    newt = self.text_component.text[max(self.text_component.text.rfind(" "),
-                                                        self.text_component.text.rfind("-")):]
-                    self.text_component.text = self.text_component.text.rstrip(newt)
-                    self.multiline.add_field(newt)
-                    self.multiline.wrappedLines.append(self.multiline.currentField)
-                    # if self.multiline.currentField == len(self.multiline.textFields)-1:
-                    #    self.multiline.addField(newt)
-                    # else:
-                    #    self.multiline.prependToNextField(newt)
-                    self.text_component.refresh()
-                    self.update_overflow()
             self.indicator_px_position = self.get_px_position()
 
         def backspace(self):
@@ -1322,12 +2332,7 @@ class GUI(object):
                 self.text_component.text = (self.text_component.text[:self.indicator_position] +
                                             self.text_component.text[self.indicator_position + 1:])
                 self.text_component.refresh()
-            else:
-                if self.multiline is not None and self.multiline.currentField > 0:
-                    self.multiline.remove_field(self)
-                    self.multiline.textFields[self.multiline.currentField - 1].append_char(
-                        self.text_component.text.strip(" "))
-                    self.multiline.textFields[self.multiline.currentField - 1].activate()
+                self.index_text(self.indicator_position)
             self.update_overflow()
 
         def delete(self):
@@ -1336,9 +2341,8 @@ class GUI(object):
                 self.text_component.text = (self.text_component.text[:self.indicator_position] +
                                             self.text_component.text[self.indicator_position + 1:])
                 self.text_component.refresh()
+                self.index_text(self.indicator_position)
             self.update_overflow()
-            if self.multiline is not None:
-                self.append_char(self.multiline.get_delete_char())
 
         def get_text(self):
             # type: () -> str
@@ -1378,6 +2382,10 @@ class GUI(object):
             self.pages = data.get("pages", [])                                      # type: List[GUI.Container,...]
             self.current_page = 0                                                   # type: int
             self.hide_controls = data.get("hideControls", False)                    # type: bool
+            self.on_page_changed = data.get("onPageChanged", None)                  # type: Callable[[int], None]
+            self.page_factory = None                                                # type: Callable[[int], List]
+            self.bulk = False                                                       # type: bool
+            self.keep_pages = data.get("keepPages", 1)                              # type: int
             self.page_controls = GUI.Container((0, self.height - 20),
                                                color=state.get_color_palette().get_color("background"),
                                                width=self.width,
@@ -1406,15 +2414,80 @@ class GUI(object):
             self.page_controls.add_child(self.page_right_button)
             if not self.hide_controls:
                 super(GUI.PagedContainer, self).add_child(self.page_controls)
+            if "pageFactory" in data:
+                self.set_page_factory(data.get("pageCount", 0), data["pageFactory"])
+
+        def set_page_factory(self, count, factory):
+            # type: (int, Callable[[int], List[GUI.Component]]) -> None
+            # Replaces the pages with count unbuilt ones. factory(number) returns a page's components the first time
+            # it is shown, and pages further than keep_pages from the current one are released again.
+            if count == 0:
+                self.page_factory = None
+                self.clear_children()
+                return
+            self.page_factory = factory
+            self.reload_pages(count)
+
+        def reload_pages(self, count=None):
+            # type: (Optional[int]) -> None
+            """Drops every built page so the page factory builds them again from its current items.
+
+            This is how items are added to or removed from a factory-built container: change the list the factory
+            reads, then reload with the new page count, or the same count when it is left out. The current page is
+            kept if it still exists.
+            """
+            if self.page_factory is None:
+                raise ValueError("reload_pages needs a page factory; set one with set_page_factory.")
+            if count is None:
+                count = len(self.pages)
+            if count == 0:
+                self.set_page_factory(0, None)
+                return
+            self.pages = [None] * count
+            self.goto_page(min(self.current_page, count - 1))
+
+        def place_child(self, page, component):
+            # type: (GUI.Container, GUI.Component) -> None
+            page.add_child(component)
+
+        def build_page(self, number):
+            # type: (int) -> GUI.Container
+            page = self.generate_page(color=self.background_color)
+            for component in self.page_factory(number):
+                self.place_child(page, component)
+            return page
+
+        def release_pages(self):
+            # type: () -> None
+            for number in range(len(self.pages)):
+                if self.pages[number] is not None and abs(number - self.current_page) > self.keep_pages:
+                    self.pages[number] = None
 
         def add_page(self, page):
             # type: (GUI.Container) -> None
             self.pages.append(page)
-            self.page_indicator_text.text = str(self.current_page + 1) + " of " + str(len(self.pages))
-            self.page_indicator_text.refresh()
+            if not self.bulk:
+                self.update_page_indicator()
+
+        def update_page_indicator(self):
+            # type: () -> None
+            self.page_indicator_text.set_text(str(self.current_page + 1) + " of " + str(len(self.pages)))
+
+        def add_children(self, *children):
+            # type: (Tuple[GUI.Component, ...]) -> None
+            # The page indicator is only rendered once for the whole batch.
+            self.bulk = True
+            try:
+                for child in children:
+                    self.add_child(child)
+            finally:
+                self.bulk = False
+            self.update_page_indicator()
 
         def get_page(self, number):
             # type: (int) -> GUI.Container
+            if self.pages[number] is None:
+                self.pages[number] = self.build_page(number)
             return self.pages[number]
 
         def page_left(self):
@@ -1432,8 +2505,11 @@ class GUI(object):
             self.current_page = number
             self.page_holder.clear_children()
             self.page_holder.add_child(self.get_page(self.current_page))
-            self.page_indicator_text.set_text(str(self.current_page + 1) + " of " + str(len(self.pages)))
-            self.page_indicator_text.refresh()
+            if self.page_factory is not None and self.keep_pages is not None:
+                self.release_pages()
+            self.update_page_indicator()
+            if self.on_page_changed is not None:
+                self.on_page_changed(self.current_page)
 
         def goto_last_page(self):
             # type: () -> None
@@ -1441,7 +2517,7 @@ class GUI(object):
 
         def get_last_page(self):
             # type: () -> GUI.Container
-            return self.pages[-1]
+            return self.get_page(len(self.pages) - 1)
 
         def generate_page(self, **data):
             # type: (...) -> GUI.Container
@@ -1461,13 +2537,46 @@ class GUI(object):
 
         def remove_child(self, component):
             # type: (GUI.Component) -> None
-            self.pages[self.current_page].remove_child(component)
-            children_copy = self.pages[self.current_page].child_components[:]
-            for page in self.pages:
-                for child in page.child_components:
-                    page.remove_child(child)
-            for child in children_copy:
+            self.remove_children(component)
+
+        def remove_children(self, *children):
+            # type: (Tuple[GUI.Component, ...]) -> None
+            """Removes the children and moves the ones after them up to fill the gap.
+
+            Raises ValueError on a container filled by a page factory, whose unbuilt pages hold no children yet and
+            whose built ones are rebuilt from the factory's items. Remove the items there and call reload_pages.
+            """
+            # Children before the first removed one keep their place; only the ones after it are added again.
+            if self.page_factory is not None:
+                raise ValueError("Children of a factory-built container are removed from the factory's items, "
+                                 "followed by reload_pages.")
+            removed = set(children)
+            first = None
+            for number, page in enumerate(self.pages):
+                if page is None:
+                    continue
+                for index, child in enumerate(page.child_components):
+                    if child in removed:
+                        first = (number, index)
+                        break
+                if first is not None:
+                    break
+            if first is None:
+                return
+            number, index = first
+            tail = []
+            for page in self.pages[number:]:
+                if page is not None:
+                    tail.extend(page.child_components)
+            tail = [child for child in tail[index:] if child not in removed]
+            del self.pages[number].child_components[index:]
+            del self.pages[number + (1 if index > 0 else 0):]
+            for child in tail:
                 self.add_child(child)
+            if len(self.pages) == 0:
+                self.clear_children()
+            else:
+                self.goto_page(min(self.current_page, len(self.pages) - 1))
 
         def remove_page(self, page):
             # type: (Union[int, GUI.Container]) -> None
@@ -1480,6 +2589,7 @@ class GUI(object):
 
         def clear_children(self):
             # type: () -> None
+            self.page_factory = None
             self.pages = []
             self.add_page(self.generate_page(color=self.background_color))
             self.goto_page()
@@ -1504,23 +2614,25 @@ class GUI(object):
             else:
                 return len(number.child_components) == (self.rows * self.columns)
 
-        def add_child(self, component):
-            # type: (GUI.Component) -> None
-            if len(self.pages) == 0 or self.is_page_filled(self.get_last_page()):
-                self.add_page(self.generate_page(color=self.background_color))
+        def place_child(self, page, component):
+            # type: (GUI.Container, GUI.Component) -> None
             new_child_position = [self.padding, self.padding]
-            if self.get_last_page().child_components == []:
-                component.set_position(new_child_position)
-                self.get_last_page().add_child(component)
-                return
-            last_child_position = self.get_last_page().child_components[
-                                    len(self.get_last_page().child_components) - 1].position[:]
-            if last_child_position[0] < self.padding + (self.perColumn * (self.columns - 1)):
-                new_child_position = [last_child_position[0] + self.perColumn, last_child_position[1]]
-            else:
-                new_child_position = [self.padding, last_child_position[1] + self.perRow]
+            if page.child_components != []:
+                last_child_position = page.child_components[-1].position[:]
+                if last_child_position[0] < self.padding + (self.perColumn * (self.columns - 1)):
+                    new_child_position = [last_child_position[0] + self.perColumn, last_child_position[1]]
+                else:
+                    new_child_position = [self.padding, last_child_position[1] + self.perRow]
             component.set_position(new_child_position)
-            self.get_last_page().add_child(component)
+            page.add_child(component)
+
+        def add_child(self, component):
+            # type: (GUI.Component) -> None
+            page = self.get_last_page() if len(self.pages) > 0 else None
+            if page is None or self.is_page_filled(page):
+                page = self.generate_page(color=self.background_color)
+                self.add_page(page)
+            self.place_child(page, component)
 
     class ListPagedContainer(PagedContainer):
         def __init__(self, position, **data):
@@ -1530,12 +2642,26 @@ class GUI(object):
             super(GUI.ListPagedContainer, self).__init__(position, **data)
 
         def get_height_of_components(self):
-            height = self.padding
-            if self.pages == []:
+            # Children are stacked, so the height used comes from the last one.
+            if self.pages == [] or self.get_last_page().child_components == []:
                 return self.padding
-            for component in self.get_last_page().child_components:
-                height += component.height + (2 * self.margin)
-            return height
+            last = self.get_last_page().child_components[-1]
+            return last.position[1] + last.height + (2 * self.margin)
+
+        def get_page_capacity(self, item_height):
+            # type: (int) -> int
+            # How many items of one height add_child puts on a page, for sizing a page factory.
+            return max(1, (self.page_holder.height - (3 * self.padding) - 1) / (item_height + (2 * self.margin)))
+
+        def place_child(self, page, component):
+            # type: (GUI.Container, GUI.Component) -> None
+            top = self.padding
+            if page.child_components != []:
+                last = page.child_components[-1]
+                top = last.position[1] + last.height + (2 * self.margin)
+            component.set_position([self.padding, top])
+            page.add_child(component)
+            component.refresh()
 
         def add_child(self, component):
             # type: (GUI.Component) -> None
@@ -1543,17 +2669,7 @@ class GUI(object):
             if self.pages == [] or component_height + (component.height + 2 * self.margin) + (
                     2 * self.padding) >= self.page_holder.height:
                 self.add_page(self.generate_page(color=self.background_color))
-                component_height = self.get_height_of_components()
-            component.set_position([self.padding, component_height])
-            self.get_last_page().add_child(component)
-            component.refresh()
-
-        def remove_child(self, component):
-            # type: (GUI.Component) -> None
-            super(GUI.ListPagedContainer, self).remove_child(component)
-            if self.pages[0].child_components == []:
-                self.remove_page(0)
-                self.goto_page()
+            self.place_child(self.get_last_page(), component)
 
     class ButtonRow(Container):
         def __init__(self, position, **data):
@@ -1578,12 +2694,39 @@ class GUI(object):
                 component.set_position([self.padding, self.padding])
             super(GUI.ButtonRow, self).add_child(component)
 
+        def insert_child(self, index, component):
+            # type: (int, GUI.Component) -> None
+            # The buttons' x positions are the running sum of the widths before them, so only later ones move.
+            component.height = self.height - (2 * self.padding)
+            if index > 0:
+                last = self.child_components[index - 1]
+                component.set_position([last.position[0] + last.width + self.margin, self.padding])
+            else:
+                component.set_position([self.padding, self.padding])
+            self.child_components.insert(index, component)
+            for child in self.child_components[index + 1:]:
+                child.position[0] += component.width + self.margin
+
         def remove_child(self, component):
-            super(GUI.ButtonRow, self).remove_child(component)
-            children_copy = self.child_components[:]
-            self.clear_children()
-            for child in children_copy:
-                self.add_child(child)
+            # type: (GUI.Component) -> None
+            self.remove_children(component)
+
+        def remove_children(self, *children):
+            # type: (Tuple[GUI.Component, ...]) -> None
+            removed = set(children)
+            shift = 0
+            remaining = []
+            for child in self.child_components:
+                if child in removed:
+                    shift += child.width + self.margin
+                else:
+                    child.position[0] -= shift
+                    remaining.append(child)
+            self.child_components = remaining
+
+        def clear_children(self):
+            # type: () -> None
+            del self.child_components[:]
 
     class ScrollIndicator(Component):
         def __init__(self, scroll_cont, position, color, **data):
@@ -1641,37 +2784,63 @@ class GUI(object):
             self.scrollBar.add_child(self.scrollDownBtn)
             super(GUI.ScrollableContainer, self).add_child(self.container)
             super(GUI.ScrollableContainer, self).add_child(self.scrollBar)
+            # Children keep content coordinates; the offset is only applied when rendering and hit-testing.
             self.offset = 0
             self.minOffset = 0
             self.maxOffset = self.height
+            self.tallest = 0                                # type: int
+            self.sorted = True                              # type: bool
+            self.bulk = False                               # type: bool
             self.scrollIndicator.update()
 
+        def on_resize(self):
+            # type: () -> None
+            self.container.set_size(self.width - 20, self.height)
+            self.scrollBar.position[0] = self.width - 20
+            self.scrollBar.set_size(20, self.height)
+            self.scrollDownBtn.position[1] = self.height - 40
+            self.scrollIndicator.set_size(20, self.height - 80)
+            self.refresh(False)
+
         def scroll(self, amount):
             # type: (int) -> None
-            if amount < 0:
-                if self.offset - amount - self.height <= -self.maxOffset:
-                    self.scroll_to(-self.maxOffset + self.height)
-                    return
-            else:
-                if self.offset + amount > self.minOffset:
-                    self.scroll_to(self.minOffset)
-                    return
-            for child in self.container.child_components:
-                child.position[1] = child.position[1] + amount
-            self.offset += amount
-            self.scrollIndicator.update()
+            self.scroll_to(self.offset + amount)
 
         def scroll_to(self, amount):
             # type: (int) -> None
-            self.scroll(-self.offset)
-            self.scroll(amount)
+            top = -self.minOffset
+            self.offset = max(min(amount, top), min(top, self.height - self.maxOffset))
+            self.scrollIndicator.update()
+
+        def find_child(self, y):
+            # type: (int) -> int
+            # Index of the first child starting at or below y. Only valid while the children are sorted by top.
+            children = self.container.child_components
+            low = 0
+            high = len(children)
+            while low < high:
+                mid = (low + high) / 2
+                if children[mid].position[1] < y:
+                    low = mid + 1
+                else:
+                    high = mid
+            return low
 
         def get_visible_children(self):
             # type: () -> List[Component]
+            top = -self.offset
+            bottom = top + self.height
+            children = self.container.child_components
+            if not self.sorted:
+                return [child for child in children
+                        if child.position[1] + child.height >= top and child.position[1] <= bottom]
             visible = []
-            for child in self.container.child_components:
-                if child.position[1] + child.height >= 0 and child.position[1] - child.height <= self.height:
+            index = self.find_child(top - self.tallest)
+            while index < len(children) and children[index].position[1] <= bottom:
+                child = children[index]
+                if child.position[1] + child.height >= top:
                     visible.append(child)
+                index += 1
             return visible
 
         def get_clicked_child(self, mouse_event, offset_x=0, offset_y=0):
@@ -1681,6 +2850,8 @@ class GUI(object):
                 mouse_event, offset_x + self.position[0], offset_y + self.position[1])
             if clicked is not None:
                 return clicked
+            offset_x += self.position[0]
+            offset_y += self.position[1] + self.offset
             visible = self.get_visible_children()
             curr_child = len(visible)
             while curr_child > 0:
@@ -1688,69 +2859,119 @@ class GUI(object):
                 child = visible[curr_child]
                 if "skip_child_check" in child.__dict__:
                     if child.skip_child_check:
-                        if child.check_click(mouse_event, offset_x + self.position[0], offset_y + self.position[1]):
+                        if child.check_click(mouse_event, offset_x, offset_y):
                             return child
                         else:
                             continue
                     else:
-                        sub_check = child.get_clicked_child(
-                            mouse_event, offset_x + self.position[0],
-                            offset_y + self.position[1])
+                        sub_check = child.get_clicked_child(mouse_event, offset_x, offset_y)
                         if sub_check is None:
                             continue
                         return sub_check
                 else:
-                    if child.check_click(mouse_event, offset_x + self.position[0], offset_y + self.position[1]):
+                    if child.check_click(mouse_event, offset_x, offset_y):
                         return child
-            if self.check_click(mouse_event, offset_x, offset_y):
-                return self
-            return None
+            return self
 
-        def add_child(self, component):
+        def track_child(self, component):
+            # type: (GUI.Component) -> None
+            # For a child about to be appended, which leaves the children unsorted if it starts above the last one.
+            children = self.container.child_components
+            if len(children) > 0 and component.position[1] < children[-1].position[1]:
+                self.sorted = False
+            self.track_extents(component)
+
+        def track_extents(self, component):
             # type: (GUI.Component) -> None
             if component.position[1] < self.minOffset:
                 self.minOffset = component.position[1]
             if component.position[1] + component.height > self.maxOffset:
                 self.maxOffset = component.position[1] + component.height
+            if component.height > self.tallest:
+                self.tallest = component.height
+
+        def add_child(self, component):
+            # type: (GUI.Component) -> None
+            self.track_child(component)
             self.container.add_child(component)
+            if not self.bulk:
+                self.scrollIndicator.update()
+
+        def add_children(self, *children):
+            # type: (Tuple[GUI.Component, ...]) -> None
+            # The scroll indicator is only updated once for the whole batch.
+            self.bulk = True
+            try:
+                for child in children:
+                    self.add_child(child)
+            finally:
+                self.bulk = False
             self.scrollIndicator.update()
 
         def remove_child(self, component):
             # type: (GUI.Component) -> None
+            # The extents only need a rescan when the removed child was at one of the edges.
             self.container.remove_child(component)
-            if component.position[1] == self.minOffset:
-                self.minOffset = 0
-                for comp in self.container.child_components:
-                    if comp.position[1] < self.minOffset:
-                        self.minOffset = comp.position[1]
-            if component.position[1] == self.maxOffset:
-                self.maxOffset = self.height
-                for comp in self.container.child_components:
-                    if comp.position[1] + comp.height > self.maxOffset:
-                        self.maxOffset = comp.position[1] + comp.height
-            self.scrollIndicator.update()
+            if component.position[1] <= self.minOffset or component.position[1] + component.height >= self.maxOffset:
+                self.update_extents()
+            self.scroll_to(self.offset)
+
+        def remove_children(self, *children):
+            # type: (Tuple[GUI.Component, ...]) -> None
+            removed = set(children)
+            self.container.child_components = [child for child in self.container.child_components
+                                               if child not in removed]
+            for child in removed:
+                GUI.Container.release_child(child)
+            self.update_extents()
+            self.scroll_to(self.offset)
 
         def clear_children(self):
             # type: () -> None
             self.container.clear_children()
+            self.minOffset = 0
             self.maxOffset = self.height
+            self.tallest = 0
+            self.sorted = True
             self.offset = 0
             self.scrollIndicator.update()
 
+        def update_extents(self):
+            # type: () -> None
+            self.minOffset = 0
+            self.maxOffset = self.height
+            self.tallest = 0
+            self.sorted = True
+            children = self.container.child_components
+            self.container.child_components = []
+            for comp in children:
+                self.track_child(comp)
+                self.container.child_components.append(comp)
+            self.scrollIndicator.update()
+
         def render(self, larger_surface):
             # type: (pygame.Surface) -> None
-            super(GUI.ScrollableContainer, self).render(larger_surface)
+            if not self.transparent:
+                self.surface.fill(self.background_color)
+            else:
+                self.surface.fill((0, 0, 0, 0))
+            if not self.container.transparent:
+                self.container.surface.fill(self.container.background_color)
+            else:
+                self.container.surface.fill((0, 0, 0, 0))
+            for child in self.get_visible_children():
+                child.position[1] += self.offset
+                try:
+                    child.render(self.container.surface)
+                finally:
+                    child.position[1] -= self.offset
+            super(GUI.Container, self.container).render(self.surface)
+            self.scrollBar.render(self.surface)
+            super(GUI.Container, self).render(larger_surface)
 
         def refresh(self, children=True):
-            self.minOffset = 0
-            for comp in self.container.child_components:
-                if comp.position[1] < self.minOffset:
-                    self.minOffset = comp.position[1]
-            self.maxOffset = self.height
-            for comp in self.container.child_components:
-                if comp.position[1] + comp.height > self.maxOffset:
-                    self.maxOffset = comp.position[1] + comp.height
-            self.scrollIndicator.update()
+            self.update_extents()
+            self.scroll_to(self.offset)
             self.container.refresh(children)
 
     class ListScrollableContainer(ScrollableContainer):
@@ -1761,32 +2982,74 @@ class GUI(object):
 
         def get_cumulative_height(self):
             # type: () -> int
-            height = 0
+            # Each child's top is the running sum of the heights above it, so the total comes from the last one.
             if len(self.container.child_components) == 0:
-                height = 0
-            for component in self.container.child_components:
-                height += component.height + self.margin
-            return height
+                return 0
+            last = self.container.child_components[-1]
+            return last.position[1] + last.height + self.margin
 
         def add_child(self, component):
             # type: (GUI.Component) -> None
             component.position[1] = self.get_cumulative_height()
             super(GUI.ListScrollableContainer, self).add_child(component)
 
+        def insert_child(self, index, component):
+            # type: (int, GUI.Component) -> None
+            children = self.container.child_components
+            if index >= len(children):
+                self.add_child(component)
+                return
+            component.position[1] = children[index].position[1]
+            for child in children[index:]:
+                child.position[1] += component.height + self.margin
+            # Everything from index on moved down by the new child's height, so the order by top is unchanged.
+            children.insert(index, component)
+            self.track_extents(component)
+            self.maxOffset = max(self.height, self.get_cumulative_height() - self.margin)
+            self.scrollIndicator.update()
+
         def remove_child(self, component):
             # type: (GUI.Component) -> None
-            super(GUI.ListScrollableContainer, self).remove_child(component)
-            children_copy = self.container.child_components[:]
-            del self.container.child_components[:]
-            for child in children_copy:
-                self.add_child(child)
+            self.remove_children(component)
+
+        def remove_children(self, *children):
+            # type: (Tuple[GUI.Component, ...]) -> None
+            removed = set(children)
+            shift = 0
+            remaining = []
+            for child in self.container.child_components:
+                if child in removed:
+                    shift += child.height + self.margin
+                    GUI.Container.release_child(child)
+                else:
+                    child.position[1] -= shift
+                    remaining.append(child)
+            self.container.child_components = remaining
+            self.maxOffset = max(self.height, self.get_cumulative_height() - self.margin)
+            self.scroll_to(self.offset)
+
+        def relayout(self, start=0):
+            # type: (int) -> None
+            # For when children changed height after being added.
+            children = self.container.child_components
+            top = children[start - 1].position[1] + children[start - 1].height + self.margin if start > 0 else 0
+            for child in children[start:]:
+                child.position[1] = top
+                top += child.height + self.margin
+            self.update_extents()
+
+        def refresh(self, children=True):
+            # type: (Optional[bool]) -> None
+            self.container.refresh(children)
+            self.relayout()
+            self.scroll_to(self.offset)
 
     class TextScrollableContainer(ScrollableContainer):
         def __init__(self, position, text_component=DEFAULT, **data):
             # type: (Tuple[int, int], GUI.Text, ...) -> None
             # Defaults to creating a text component.
             data["scrollAmount"] = data.get(
-                "line_height", text_component.lineHeight if text_component != DEFAULT else 16)
+                "line_height", text_component.line_height if text_component != DEFAULT else 16)
 
             super(GUI.TextScrollableContainer, self).__init__(position, **data)
             if text_component == DEFAULT:
@@ -1804,129 +3067,496 @@ class GUI(object):
             # type: () -> GUI.Text
             return self.textComponent
 
-    class MultiLineTextEntryField(ListScrollableContainer):
+    class MappedTextScrollableContainer(ScrollableContainer):
+        rows_per_checkpoint = 64
+
+        def __init__(self, position, path, **data):
+            # type: (Tuple[int, int], str, ...) -> None
+            # Shows a file of any size by memory-mapping it and rasterizing only the rows near the viewport.
+            self.font = data.get("font", state.get_typing_font())                           # type: GUI.Font
+            self.text_size = data.get("size", 14)                                           # type: int
+            self.text_color = data.get("textColor", state.get_color_palette().get_color("item"))
+            self.prefetch_rows = data.get("prefetch", 10)                                   # type: int
+            self.row_height = self.font.get(self.text_size).get_linesize()                  # type: int
+            data["scrollAmount"] = data.get("scrollAmount", self.row_height * 2)
+            super(GUI.MappedTextScrollableContainer, self).__init__(position, **data)
+            self.columns = max(1, self.container.width / self.font.get(self.text_size).size("m")[0])   # type: int
+            self.file = open(path, "rb")
+            self.file_size = os.fstat(self.file.fileno()).st_size                          # type: int
+            self.map = mmap(self.file.fileno(), 0, access=ACCESS_READ) if self.file_size > 0 else ""
+            self.checkpoints = array("L", [0])              # type: array
+            self.row_count = 0                              # type: int
+            self.indexed_rows = 0                           # type: int
+            self.indexed = False                            # type: bool
+            self.closed = False                             # type: bool
+            self.rendered_rows = {}                         # type: Dict[int, pygame.Surface]
+            state.get_thread_controller().add_thread(ParallelTask(self.build_index))
+
+        def build_index(self):
+            # type: () -> None
+            # Runs in the background. Only every rows_per_checkpoint-th row offset is kept, so the index stays small.
+            pos = 0
+            rows = 0
+            try:
+                while pos < self.file_size and not self.closed:
+                    end = self.map.find("\n", pos)
+                    if end == -1:
+                        end = self.file_size
+                    line_rows = max(1, (end - pos + self.columns - 1) / self.columns)
+                    for line_row in range(line_rows):
+                        if rows > 0 and rows % GUI.MappedTextScrollableContainer.rows_per_checkpoint == 0:
+                            self.checkpoints.append(pos + (line_row * self.columns))
+                        rows += 1
+                    pos = end + 1
+                    self.row_count = rows
+            except ValueError:
+                return  # The map was closed while indexing.
+            self.indexed = True
+
+        def next_row(self, start):
+            # type: (int) -> Tuple[str, int]
+            newline = self.map.find("\n", start, start + self.columns + 1)
+            if newline != -1:
+                return self.map[start:newline], newline + 1
+            end = min(start + self.columns, self.file_size)
+            return self.map[start:end], end
+
+        def get_rows(self, first, last):
+            # type: (int, int) -> List[str]
+            per = GUI.MappedTextScrollableContainer.rows_per_checkpoint
+            position = self.checkpoints[first / per]
+            row = (first / per) * per
+            rows = []
+            while row < last and row < self.row_count:
+                text, position = self.next_row(position)
+                if row >= first:
+                    rows.append(text)
+                row += 1
+            return rows
+
+        def render_row(self, text):
+            # type: (str) -> pygame.Surface
+            text = text.rstrip("\r").replace("\t", " ").replace("\0", " ").decode("utf-8", "replace")
+            return self.font.get(self.text_size).render(text, 1, self.text_color)
+
+        def prefetch(self, first, last):
+            # type: (int, int) -> None
+            first = max(0, first)
+            last = min(last, self.row_count)
+            for row in self.rendered_rows.keys():
+                if row < first or row >= last:
+                    del self.rendered_rows[row]
+            missing = [row for row in range(first, last) if row not in self.rendered_rows]
+            if len(missing) > 0:
+                for row, text in zip(range(missing[0], missing[-1] + 1), self.get_rows(missing[0], missing[-1] + 1)):
+                    if row not in self.rendered_rows:
+                        self.rendered_rows[row] = self.render_row(text)
+
+        def update_extents(self):
+            # type: () -> None
+            if self.indexed_rows != self.row_count:
+                self.indexed_rows = self.row_count
+                self.maxOffset = max(self.height, self.indexed_rows * self.row_height)
+                self.scrollIndicator.update()
+
+        def close(self):
+            # type: () -> None
+            if self.closed:
+                return
+            self.closed = True
+            self.rendered_rows = {}
+            if self.file_size > 0:
+                self.map.close()
+            self.file.close()
+
+        def render(self, larger_surface):
+            # type: (pygame.Surface) -> None
+            self.update_extents()
+            if not self.transparent:
+                self.surface.fill(self.background_color)
+            else:
+                self.surface.fill((0, 0, 0, 0))
+            if not self.closed:
+                first = int(-self.offset) / self.row_height
+                visible = (self.height / self.row_height) + 2
+                self.prefetch(first - self.prefetch_rows, first + visible + self.prefetch_rows)
+                self.surface.set_clip(pygame.Rect(0, 0, self.container.width, self.height))
+                for row in range(first, min(first + visible, self.indexed_rows)):
+                    self.surface.blit(self.rendered_rows[row], (0, (row * self.row_height) + self.offset))
+                self.surface.set_clip(None)
+            self.scrollBar.render(self.surface)
+            super(GUI.Container, self).render(larger_surface)
+
+    class VirtualListContainer(ScrollableContainer):
+        def __init__(self, position, source, **data):
+            # type: (Tuple[int, int], Any, ...) -> None
+            # The source provides count(), create_row(width, height) and bind(row, index).
+            # Only enough rows to fill the viewport are created, and they are rebound as the list scrolls.
+            self.source = source
+            self.row_height = data.get("rowHeight", 40)                                     # type: int
+            data["scrollAmount"] = data.get("scrollAmount", self.row_height)
+            super(GUI.VirtualListContainer, self).__init__(position, **data)
+            self.rows = []                                  # type: List[GUI.Component]
+            self.bound = []                                 # type: List[int]
+            self.row_count = 0                              # type: int
+            self.reload()
+
+        def get_pool_size(self):
+            # type: () -> int
+            return min(self.row_count, (self.height / self.row_height) + 2)
+
+        def reload(self):
+            # type: () -> None
+            # Call when the source's items change. Every row is rebound on the next layout.
+            self.row_count = self.source.count()
+            while len(self.rows) < self.get_pool_size():
+                self.rows.append(self.source.create_row(self.container.width, self.row_height))
+            self.bound = [-1] * len(self.rows)
+            self.maxOffset = max(self.height, self.row_count * self.row_height)
+            self.offset = max(min(self.offset, 0), self.height - self.maxOffset)
+            self.layout_rows()
+            self.scrollIndicator.update()
+
+        def rebind(self, index):
+            # type: (int) -> None
+            if len(self.rows) > 0 and self.bound[index % len(self.rows)] == index:
+                self.source.bind(self.rows[index % len(self.rows)], index)
+
+        def layout_rows(self):
+            # type: () -> None
+            # Index i always lives in slot i % len(rows), so scrolling by one row rebinds one row.
+            visible = []
+            if len(self.rows) > 0:
+                first = int(-self.offset) / self.row_height
+                for index in range(first, min(first + len(self.rows), self.row_count)):
+                    slot = index % len(self.rows)
+                    row = self.rows[slot]
+                    if self.bound[slot] != index:
+                        self.source.bind(row, index)
+                        self.bound[slot] = index
+                    row.position[1] = index * self.row_height
+                    visible.append(row)
+            self.container.child_components = visible
+
+        def get_visible_children(self):
+            # type: () -> List[GUI.Component]
+            return self.container.child_components
+
+        def get_row_index(self, row):
+            # type: (GUI.Component) -> int
+            return self.bound[self.rows.index(row)]
+
+        def scroll_to(self, amount):
+            # type: (int) -> None
+            super(GUI.VirtualListContainer, self).scroll_to(amount)
+            self.layout_rows()
+
+        def scroll_to_index(self, index):
+            # type: (int) -> None
+            top = index * self.row_height
+            if top + self.offset < 0:
+                self.scroll_to(-top)
+            elif top + self.row_height + self.offset > self.height:
+                self.scroll_to(self.height - top - self.row_height)
+
+        def refresh(self, children=True):
+            # type: (bool) -> None
+            self.reload()
+
+    class GapBuffer(object):
+        def __init__(self, text="", gap=64):
+            # type: (Optional[str], Optional[int]) -> None
+            self.chars = list(text) + ([""] * gap)      # type: List[str]
+            self.gap_start = len(text)                  # type: int
+            self.gap_end = len(self.chars)              # type: int
+
+        def __len__(self):
+            # type: () -> int
+            return len(self.chars) - (self.gap_end - self.gap_start)
+
+        def move_gap(self, position):
+            # type: (int) -> None
+            if position < self.gap_start:
+                count = self.gap_start - position
+                self.chars[self.gap_end - count:self.gap_end] = self.chars[position:self.gap_start]
+                self.gap_start = position
+                self.gap_end -= count
+            elif position > self.gap_start:
+                count = position - self.gap_start
+                self.chars[self.gap_start:self.gap_start + count] = self.chars[self.gap_end:self.gap_end + count]
+                self.gap_start += count
+                self.gap_end += count
+
+        def insert(self, position, text):
+            # type: (int, str) -> None
+            self.move_gap(position)
+            if len(text) > self.gap_end - self.gap_start:
+                grow = max(len(text), len(self.chars))
+                self.chars[self.gap_end:self.gap_end] = [""] * grow
+                self.gap_end += grow
+            self.chars[self.gap_start:self.gap_start + len(text)] = list(text)
+            self.gap_start += len(text)
+
+        def delete(self, position, count=1):
+            # type: (int, Optional[int]) -> int
+            count = max(min(count, len(self) - position), 0)
+            self.move_gap(position)
+            self.gap_end += count
+            return count
+
+        def get_slice(self, start, end):
+            # type: (int, int) -> str
+            if end <= self.gap_start:
+                return "".join(self.chars[start:end])
+            gap = self.gap_end - self.gap_start
+            if start >= self.gap_start:
+                return "".join(self.chars[start + gap:end + gap])
+            return "".join(self.chars[start:self.gap_start]) + "".join(self.chars[self.gap_end:end + gap])
+
+        def get_text(self):
+            # type: () -> str
+            return self.get_slice(0, len(self))
+
+    class MultiLineTextEntryField(ScrollableContainer):
         def __init__(self, position, initial_text="", **data):
             # type: (Tuple[int, int], str, ...) -> None
+            # The text lives in one gap buffer. Only the wrapped lines touched by an edit are rewrapped,
+            # and only the visible lines are rasterized.
             if "border" not in data:
                 data["border"] = 1
                 data["border_color"] = state.get_color_palette().get_color("accent")
-            data["onClick"] = self.activate_last
-            data["onClickData"] = ()
-            super(GUI.MultiLineTextEntryField, self).__init__(position, **data)
             self.line_height = data.get("line_height", 20)                      # type: int
+            data["scrollAmount"] = data.get("scrollAmount", self.line_height)
+            super(GUI.MultiLineTextEntryField, self).__init__(position, **data)
             self.max_lines = data.get("maxLines", -2)                           # type: int
             self.background_color = data.get("background_color", state.get_color_palette().get_color("background"))
             self.text_color = data.get("color", state.get_color_palette().get_color("item"))
-            self.text_fields = []                                               # type: list
-            self.wrapped_lines = []                                             # type: list
-            self.current_field = -1                                             # type: int
+            self.font = data.get("font", state.get_typing_font())               # type: GUI.Font
+            self.text_size = data.get("size", 16)                               # type: int
+            self.wrap_width = self.container.width - 4                          # type: int
+            self.buffer = GUI.GapBuffer()                                       # type: GUI.GapBuffer
+            self.line_starts = array("L", [0])                                  # type: array
+            self.cursor = 0                                                     # type: int
+            self.rendered_lines = {}                        # type: Dict[int, Tuple[str, pygame.Surface]]
+            self.blink_interval = data.get("blink", 500)                        # type: int
+            self.blink_on = False                                               # type: bool
+            self.last_blink = datetime.now()                                    # type: datetime
+            self.internal_click_overrides["onClick"] = (self.activate, ())
             self.set_text(initial_text)
 
-        def activate_last(self):
-            # type: () -> None
-            self.current_field = len(self.text_fields) - 1
-            self.text_fields[self.current_field].activate()
+        def get_wrapper(self):
+            # type: () -> GUI.TextWrapper
+            return GUI.TextWrapper.get(self.font.get(self.text_size))
+
+        def wrap_line(self, start, length):
+            # type: (int, int) -> Tuple[int, bool]
+            # Returns where the line after the one starting at start begins, and whether there is one.
+            measure = self.get_wrapper().measure
+            x = 0
+            last_space = -1
+            chunk = ""
+            chunk_start = start
+            i = start
+            while i < length:
+                if i - chunk_start >= len(chunk):
+                    chunk_start = i
+                    chunk = self.buffer.get_slice(i, min(length, i + 128))
+                char = chunk[i - chunk_start]
+                if char == "\n":
+                    return i + 1, True
+                x += measure(char)
+                if x > self.wrap_width and i > start:
+                    if char == " ":
+                        return i + 1, True
+                    if last_space > start:
+                        return last_space, True
+                    return i, True
+                if char == " ":
+                    last_space = i + 1
+                i += 1
+            return length, False
+
+        def reflow(self, position, delta):
+            # type: (int, int) -> None
+            # Rewraps from the line before the edit until a line break lands where an old one did after
+            # the edit. Breaks past that point only move by delta.
+            starts = self.line_starts
+            length = len(self.buffer)
+            line = max(bisect_right(starts, position) - 2, 0)
+            edit_end = position + max(delta, 0)
+            j = bisect_left(starts, position + max(-delta, 0))
+            new_starts = []
+            pos = starts[line]
+            converged = False
+            while True:
+                pos, more = self.wrap_line(pos, length)
+                if not more:
+                    break
+                while j < len(starts) and starts[j] + delta < pos:
+                    j += 1
+                if pos >= edit_end and j < len(starts) and starts[j] + delta == pos:
+                    converged = True
+                    break
+                new_starts.append(pos)
+            tail = array("L", [start + delta for start in starts[j:]]) if converged else array("L")
+            self.line_starts = starts[:line + 1] + array("L", new_starts) + tail
+            self.update_extents()
+
+        def get_line_count(self):
+            # type: () -> int
+            return len(self.line_starts)
 
-        def refresh(self, children=True):
-            # type: (Optional[bool]) -> None
-            self.clear_children()
-            for tf in self.text_fields:
-                self.add_child(tf)
+        def get_line_end(self, line):
+            # type: (int) -> int
+            if line + 1 < len(self.line_starts):
+                return self.line_starts[line + 1]
+            return len(self.buffer)
 
-        def set_current(self, field):
-            # type: (int) -> None
-            self.current_field = self.text_fields.index(field)
+        def get_line_text(self, line):
+            # type: (int) -> str
+            text = self.buffer.get_slice(self.line_starts[line], self.get_line_end(line))
+            return text[:-1] if text.endswith("\n") else text
+
+        def get_cursor_line(self):
+            # type: () -> int
+            return bisect_right(self.line_starts, self.cursor) - 1
+
+        def get_cursor_coordinates(self):
+            # type: () -> Tuple[int, int]
+            line = self.get_cursor_line()
+            measure = self.get_wrapper().measure
+            x = sum(measure(char) for char in self.buffer.get_slice(self.line_starts[line], self.cursor))
+            return x, line * self.line_height
+
+        def get_index_at(self, x, y):
+            # type: (int, int) -> int
+            line = max(min(y / self.line_height, len(self.line_starts) - 1), 0)
+            index = self.line_starts[line]
+            end = self.get_line_end(line) - (1 if line + 1 < len(self.line_starts) else 0)
+            measure = self.get_wrapper().measure
+            left = 0
+            for char in self.buffer.get_slice(index, end):
+                width = measure(char)
+                if x < left + (width / 2):
+                    break
+                left += width
+                index += 1
+            return index
+
+        def activate(self):
+            # type: () -> GUI.MultiLineTextEntryField
+            state.set_keyboard(GUI.Keyboard(self))
+            x = self.inner_click_coordinates[0] - self.position[0] - 2
+            y = self.inner_click_coordinates[1] - self.position[1] - self.offset
+            if x < self.container.width:
+                self.cursor = self.get_index_at(x, y)
+            state.get_keyboard().active = True
+            return self
+
+        def is_active(self):
+            # type: () -> bool
+            keyboard = state.get_keyboard()
+            return keyboard is not None and keyboard.active and keyboard.text_entry_field is self
 
-        def add_field(self, initial_text):
+        def append_char(self, char):
             # type: (str) -> None
-            if len(self.text_fields) == self.max_lines:
+            position = self.cursor
+            self.buffer.insert(position, char)
+            self.reflow(position, len(char))
+            if 0 < self.max_lines < len(self.line_starts):
+                self.buffer.delete(position, len(char))
+                self.reflow(position, -len(char))
                 return
-            field = GUI.TextEntryField((0, 0), initial_text, width=self.container.width, height=self.line_height,
-                                       backgroundColor=self.background_color, textColor=self.text_color)
-            field.border = 0
-            field.multiline = self
-            self.current_field += 1
-            self.text_fields.insert(self.current_field, field)
-            field.activate()
-            self.refresh()
+            self.cursor += len(char)
+            self.scroll_to_cursor()
 
-        #         def prependToNextField(self, text): #HOLD FOR NEXT RELEASE
-        #             print "Prep: "+text
-        #             self.currentField += 1
-        #             currentText = self.textFields[self.currentField].textComponent.text
-        #             self.textFields[self.currentField].textComponent.text = ""
-        #             self.textFields[self.currentField].indicatorPosition = 0
-        #             self.textFields[self.currentField].refresh()
-        #             self.textFields[self.currentField].activate()
-        #             for word in (" "+text+" "+currentText).split(" "):
-        #                 self.textFields[self.currentField].appendChar(word+" ")
-        #             self.textFields[self.currentField].refresh()
-
-        def remove_field(self, field):
-            # type: (str) -> None
-            if self.current_field > 0:
-                if self.text_fields.index(field) == self.current_field:
-                    self.current_field -= 1
-                self.text_fields.remove(field)
-            self.refresh()
+        def backspace(self):
+            # type: () -> None
+            if self.cursor > 0:
+                self.cursor -= 1
+                self.buffer.delete(self.cursor)
+                self.reflow(self.cursor, -1)
+                self.scroll_to_cursor()
 
-        def get_delete_char(self):
-            # type: () -> str
-            if self.current_field < len(self.text_fields) - 1:
-                c = ""
-                try:
-                    c = self.text_fields[self.current_field + 1].textComponent.text[0]
-                    textcomp = self.text_fields[self.current_field + 1].textComponent
-                    textcomp.text = self.text_fields[self.current_field + 1].textComponent.text[1:]
-                    self.text_fields[self.current_field + 1].update_overflow()
-                    self.text_fields[self.current_field + 1].refresh()
-                except:
-                    self.remove_field(self.text_fields[self.current_field + 1])
-                return c
-            return ""
+        def delete(self):
+            # type: () -> None
+            if self.cursor < len(self.buffer):
+                self.buffer.delete(self.cursor)
+                self.reflow(self.cursor, -1)
 
         def get_text(self):
             # type: () -> str
-            t = ""
-            p = 0
-            for ftext in [f.get_text() for f in self.text_fields]:
-                if p in self.wrapped_lines:
-                    t += ftext
-                else:
-                    t += ftext + "\n"
-                p += 1
-            t.rstrip("\n")
-            return t
+            return self.buffer.get_text()
 
         def clear(self):
             # type: () -> None
-            self.text_fields = []
-            self.wrapped_lines = []
-            self.current_field = -1
-            self.refresh()
+            self.set_text("")
 
         def set_text(self, text):
-            self.clear()
-            if text == "":
-                self.add_field("")
+            # type: (str) -> None
+            self.buffer = GUI.GapBuffer(text.replace("\r", ""))
+            self.line_starts = array("L", [0])
+            self.reflow(0, len(self.buffer))
+            if 0 < self.max_lines < len(self.line_starts):
+                end = self.line_starts[self.max_lines]
+                if self.buffer.get_slice(end - 1, end) == "\n":
+                    end -= 1
+                self.buffer.delete(end, len(self.buffer))
+                self.line_starts = array("L", [0])
+                self.reflow(0, len(self.buffer))
+            self.cursor = len(self.buffer)
+
+        def update_extents(self):
+            # type: () -> None
+            self.maxOffset = max(self.height, len(self.line_starts) * self.line_height)
+            self.offset = max(min(self.offset, 0), self.height - self.maxOffset)
+            self.scrollIndicator.update()
+
+        def scroll_to_cursor(self):
+            # type: () -> None
+            y = self.get_cursor_line() * self.line_height
+            if y + self.offset < 0:
+                self.offset = -y
+            elif y + self.line_height + self.offset > self.height:
+                self.offset = self.height - y - self.line_height
+            self.update_extents()
+
+        def refresh(self, children=True):
+            # type: (Optional[bool]) -> None
+            super(GUI.MultiLineTextEntryField, self).refresh(children)
+            self.update_extents()
+
+        def render(self, larger_surface):
+            # type: (pygame.Surface) -> None
+            if not self.transparent:
+                self.surface.fill(self.background_color)
             else:
-                for line in text.replace("\r", "").split("\n"):
-                    self.add_field("")
-                    line = line.rstrip()
-                    words = line.split(" ")
-                    old_n = self.current_field
-                    for word in words:
-                        self.text_fields[self.current_field].append_char(word)
-                        self.text_fields[self.current_field].append_char(" ")
-                    if old_n != self.current_field:
-                        for n in range(old_n, self.current_field):
-                            self.wrapped_lines.append(n)
-                for field in self.text_fields:
-                    if field.overflow > 0:
-                        field.textComponent.set_text(field.textComponent.text.rstrip(" "))
-                        field.update_overflow()
-            self.refresh()
-            state.get_keyboard().deactivate()
+                self.surface.fill((0, 0, 0, 0))
+            first = max(int(-self.offset) / self.line_height, 0)
+            last = min(first + (self.height / self.line_height) + 2, len(self.line_starts))
+            for line in self.rendered_lines.keys():
+                if line < first or line >= last:
+                    del self.rendered_lines[line]
+            text_top = (self.line_height - self.get_wrapper().line_height) / 2
+            self.surface.set_clip(pygame.Rect(0, 0, self.container.width, self.height))
+            for line in range(first, last):
+                text = self.get_line_text(line)
+                rendered = self.rendered_lines.get(line)
+                if rendered is None or rendered[0] != text:
+                    rendered = (text, self.font.render(text, self.text_size, self.text_color, cached=False))
+                    self.rendered_lines[line] = rendered
+                self.surface.blit(rendered[1], (2, (line * self.line_height) + self.offset + text_top))
+            if self.is_active():
+                if ((datetime.now() - self.last_blink).microseconds / 1000) >= self.blink_interval:
+                    self.last_blink = datetime.now()
+                    self.blink_on = not self.blink_on
+                if self.blink_on:
+                    x, y = self.get_cursor_coordinates()
+                    pygame.draw.rect(self.surface, self.text_color,
+                                     [x + 2, y + self.offset + 2, 2, self.line_height - 4])
+            self.surface.set_clip(None)
+            self.scrollBar.render(self.surface)
+            super(GUI.Container, self).render(larger_surface)
 
     class FunctionBar(object):
         def __init__(self):
@@ -1948,6 +3578,12 @@ class GUI(object):
             self.container.add_child(self.app_title_text)
             self.container.add_child(self.clock_text)
 
+        def resize(self, width, height):
+            # type: (int, int) -> None
+            self.container.position[1] = height - 40
+            self.container.set_size(width, 40)
+            self.clock_text.position[0] = width - 45
+
         def format_time(self):
             time = str(datetime.now())
             if time.startswith("0"):
@@ -2075,11 +3711,10 @@ class GUI(object):
                     button.primaryTextComponent.refresh()
                 return
             if char == self.enter_sym:
-                mult = self.text_entry_field.multiline
-                self.deactivate()
-                if mult is not None:
-                    mult.textFields[mult.currentField].do_blink = False
-                    mult.add_field("")
+                if isinstance(self.text_entry_field, GUI.MultiLineTextEntryField):
+                    self.text_entry_field.append_char("\n")
+                else:
+                    self.deactivate()
                 return
             if char == self.bkspc_sym:
                 self.text_entry_field.backspace()
@@ -2512,11 +4147,18 @@ class Application(object):
             "Upgrading " + app_name
         package.extractall(os.path.join("apps/", app_name))
         package.close()
+        state.get_icons().invalidate(os.path.join("apps/", app_name))
+        if app_info.get("more", {}).get("icon") is not None:
+            try:
+                state.get_icons().add_app_icon(app_info["more"]["icon"], os.path.join("apps/", app_name))
+            except:
+                print "Could not add the icon of " + app_name + " to the icon atlas."
         alist = Application.get_listings()
         alist[os.path.join("apps/", app_name)] = app_name
         listingsfile = open("apps/apps.json", "w")
         json.dump(alist, listingsfile)
         listingsfile.close()
+        AppIndex.update(os.path.join("apps/", app_name))
         return app_name
 
     @staticmethod
@@ -2536,55 +4178,84 @@ class Application(object):
         listingsfile = open("apps/apps.json", "w")
         json.dump(alist, listingsfile)
         listingsfile.close()
+        AppIndex.update(os.path.join("apps/", app_name))
         state.get_application_list().reload_list()
         GUI.OKDialog("Registered", "The application from " + path + " has been registered on the system.").display()
 
-    def __init__(self, location):
+    # Built by load() the first time one of them is used, so booting only reads the manifests.
+    lazy_attributes = ("module", "main_method", "immersion_ui", "evt_handlers", "thread", "ui", "dataStore")
+
+    def __init__(self, location, app_data=None):
         self.parameters = {}
         self.location = location
-        infofile = open(os.path.join(location, "app.json").replace("\\", "/"), "rU")
-        app_data = json.loads(str(unicode(infofile.read(), errors="ignore")))
+        if app_data is None:
+            infofile = open(os.path.join(location, "app.json").replace("\\", "/"), "rU")
+            app_data = json.loads(str(unicode(infofile.read(), errors="ignore")))
+            infofile.close()
         self.name = str(app_data.get("name"))
         self.title = str(app_data.get("title", self.name))
         self.version = float(app_data.get("version", 0.0))
         self.author = str(app_data.get("author", "No Author"))
-        self.module = import_module("apps." + str(app_data.get("module", self.name)), "apps")
-        self.module.state = state
+        self.module_name = str(app_data.get("module", self.name))
+        self.main_name = str(app_data.get("main"))
         self.file = None
-        try:
-            self.main_method = getattr(self.module, str(app_data.get("main")))
-        except:
-            self.main_method = Application.dummy
         try:
             self.parameters = app_data.get("more")
         except:
             pass
         self.description = app_data.get("description", "No Description.")
-        # Immersion check
-        if "immersive" in self.parameters:
-            self.immersion_ui = ImmersionUI(self)
-        else:
-            self.immersion_ui = None
-        # check for and load event handlers
-        self.evt_handlers = {}
-        if "onStart" in self.parameters:
-            self.evt_handlers["onStartReal"] = self.parameters["onStart"]
-        self.evt_handlers["onStart"] = [self.on_start, ()]
-        if "onStop" in self.parameters:
-            self.evt_handlers["onStop"] = getattr(self.module, self.parameters["onStop"])
-        if "onPause" in self.parameters:
-            self.evt_handlers["onPause"] = getattr(self.module, self.parameters["onPause"])
-        if "onResume" in self.parameters:
-            self.evt_handlers["onResume"] = getattr(self.module,
-                                                    self.parameters["onResume"])
-        if "onCustom" in self.parameters:
-            self.evt_handlers["onCustom"] = getattr(self.module,
-                                                    self.parameters["onCustom"])
-        self.thread = Thread(self.main_method, **self.evt_handlers)
-        self.ui = GUI.AppContainer(self)
-        self.dataStore = DataStore(self)
-        infofile.close()
-        self.thread = Thread(self.main_method, **self.evt_handlers)
+        self.loaded = False
+        self.loading_thread = None
+        self.load_lock = RLock()
+
+    def __getattr__(self, name):
+        # Another thread's load() is waited for on load_lock; only the loading thread itself, which reads the
+        # attributes before setting them, and a half-built instance get an AttributeError.
+        loading_thread = self.__dict__.get("loading_thread", current_thread())
+        if name in Application.lazy_attributes and loading_thread is not current_thread():
+            self.load()
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError(name)
+
+    def load(self):
+        with self.load_lock:
+            if self.loaded:
+                return
+            self.loading_thread = current_thread()
+            try:
+                self.module = import_module("apps." + self.module_name, "apps")
+                self.module.state = state
+                try:
+                    self.main_method = getattr(self.module, self.main_name)
+                except:
+                    self.main_method = Application.dummy
+                # Immersion check
+                if "immersive" in self.parameters:
+                    self.immersion_ui = ImmersionUI(self)
+                else:
+                    self.immersion_ui = None
+                # check for and load event handlers
+                self.evt_handlers = {}
+                if "onStart" in self.parameters:
+                    self.evt_handlers["onStartReal"] = self.parameters["onStart"]
+                self.evt_handlers["onStart"] = [self.on_start, ()]
+                if "onStop" in self.parameters:
+                    self.evt_handlers["onStop"] = getattr(self.module, self.parameters["onStop"])
+                if "onPause" in self.parameters:
+                    self.evt_handlers["onPause"] = getattr(self.module, self.parameters["onPause"])
+                if "onResume" in self.parameters:
+                    self.evt_handlers["onResume"] = getattr(self.module,
+                                                            self.parameters["onResume"])
+                if "onCustom" in self.parameters:
+                    self.evt_handlers["onCustom"] = getattr(self.module,
+                                                            self.parameters["onCustom"])
+                self.ui = GUI.AppContainer(self)
+                self.dataStore = DataStore(self)
+                self.thread = Thread(self.main_method, **self.evt_handlers)
+                self.loaded = True
+            finally:
+                self.loading_thread = None
 
     def get_module(self):
         return self.module
@@ -2649,19 +4320,137 @@ class Application(object):
 
     def uninstall(self):
         rmtree(self.location, True)
+        state.get_icons().invalidate(self.location)
+        state.get_icons().update_app_atlas(remove_folder=self.location)
         Application.remove_listing(self.location)
+        AppIndex.remove(self.location)
+
+
+class AppIndex(object):
+    # Every listed app's manifest and resolved icon, plus the file type associations, in one file. Entries are
+    # checked against the app folder's and app.json's mtimes and only stale ones are parsed again.
+    path = "temp/app_index.json"
+    version = 1
+
+    def __init__(self):
+        self.listings_mtime = None
+        self.listings = {}
+        self.apps = {}
+        self.file_types = {}
+        self.changed = False
+        try:
+            index_file = open(AppIndex.path, "rU")
+            data = json.load(index_file)
+            index_file.close()
+            if data.get("version") == AppIndex.version:
+                self.listings_mtime = data["listings_mtime"]
+                self.listings = data["listings"]
+                self.apps = data["apps"]
+                self.file_types = data["file_types"]
+        except:
+            self.changed = True
+
+    @staticmethod
+    def get_mtimes(location):
+        return [os.path.getmtime(location), os.path.getmtime(os.path.join(location, "app.json"))]
+
+    @staticmethod
+    def update(location):
+        index = AppIndex()
+        index.get_listings()
+        index.get_entry(location)
+        index.save()
+
+    @staticmethod
+    def remove(location):
+        index = AppIndex()
+        index.get_listings()
+        index.apps.pop(location, None)
+        index.changed = True
+        index.save()
+
+    def get_listings(self):
+        mtime = os.path.getmtime("apps/apps.json")
+        if mtime != self.listings_mtime:
+            self.listings = Application.get_listings()
+            self.listings_mtime = mtime
+            self.changed = True
+        return self.listings
+
+    def get_entry(self, location):
+        mtimes = AppIndex.get_mtimes(location)
+        entry = self.apps.get(location)
+        if entry is None or entry["mtimes"] != mtimes:
+            infofile = open(os.path.join(location, "app.json").replace("\\", "/"), "rU")
+            manifest = json.loads(str(unicode(infofile.read(), errors="ignore")))
+            infofile.close()
+            icon = (manifest.get("more") or {}).get("icon")
+            entry = {"mtimes": mtimes, "manifest": manifest,
+                     "icon": state.get_icons().resolve_icon(icon, location) if icon is not None else None}
+            self.apps[location] = entry
+            self.changed = True
+        elif entry["icon"] is not None:
+            state.get_icons().resolved[(entry["manifest"]["more"]["icon"], location)] = (entry["icon"][0],
+                                                                                         tuple(entry["icon"][1]))
+        return entry
+
+    def get_file_types(self):
+        # type: () -> Dict[str, List[str]]
+        if self.changed:
+            self.file_types = {}
+            for location, entry in self.apps.iteritems():
+                if location not in self.listings:
+                    continue
+                for ftype in (entry["manifest"].get("more") or {}).get("file", []):
+                    self.file_types.setdefault(ftype.lower(), []).append(str(entry["manifest"].get("name")))
+        return self.file_types
+
+    def save(self):
+        if not self.changed:
+            return
+        for location in self.apps.keys():
+            if location not in self.listings:
+                del self.apps[location]
+        data = {"version": AppIndex.version, "listings_mtime": self.listings_mtime, "listings": self.listings,
+                "apps": self.apps, "file_types": self.get_file_types()}
+        try:
+            index_file = open(AppIndex.path + ".tmp", "w")
+            json.dump(data, index_file)
+            index_file.close()
+            os.rename(AppIndex.path + ".tmp", AppIndex.path)
+            self.changed = False
+        except:
+            print "The app index could not be saved."
 
 
 class ApplicationList(object):
     def __init__(self):
         self.applications = {}
         self.active_applications = []
-        applist = Application.get_listings()
+        self.file_types = {}
+        self.load_errors = []   # type: List[Tuple[str, str]]
+        self.load_index()
+
+    def load_index(self):
+        # Boot builds the list on a worker thread, which must not draw, so failed apps are kept for report_load_errors.
+        index = AppIndex()
+        applist = index.get_listings()
         for key in dict(applist).keys():
+            if applist.get(key) in self.applications:
+                continue
             try:
-                self.applications[applist.get(key)] = Application(key)
+                self.applications[applist.get(key)] = Application(key, index.get_entry(key)["manifest"])
             except:
-                State.error_recovery("App init error: " + key, "NoAppDump")
+                self.load_errors.append((key, format_exc()))
+        for key in self.applications.keys():
+            if key not in applist.values():
+                del self.applications[key]
+        self.file_types = index.get_file_types()
+        index.save()
+
+    def get_file_handlers(self, ftype):
+        return [self.applications[name] for name in self.file_types.get(ftype.lower(), [])
+                if name in self.applications]
 
     def get_app(self, name):
         if name in self.applications:
@@ -2698,17 +4487,15 @@ class ApplicationList(object):
         if len(self.active_applications) > 1:
             return self.active_applications[1]
 
+    def report_load_errors(self):
+        # type: () -> None
+        while self.load_errors:
+            key, trace = self.load_errors.pop(0)
+            State.error_recovery("App init error: " + key, "NoAppDump", trace)
+
     def reload_list(self):
-        applist = Application.get_listings()
-        for key in dict(applist).keys():
-            if applist.get(key) not in self.applications.keys():
-                try:
-                    self.applications[applist.get(key)] = Application(key)
-                except:
-                    State.error_recovery("App init error: " + key, "NoAppDump")
-        for key in self.applications.keys():
-            if key not in applist.values():
-                del self.applications[key]
+        self.load_index()
+        self.report_load_errors()
 
 
 class Notification(object):
@@ -2821,7 +4608,7 @@ class DataStore(object):
 class State(object):
     def __init__(self, active_app=None, colors=None, icons=None, controller=None, event_queue=None,
                  notification_queue=None, functionbar=None, font=None, t_font=None, gui=None, app_list=None,
-                 keyboard=None):
+                 keyboard=None, text_cache=None):
         self.active_application = active_app
         self.color_palette = colors
         self.icons = icons
@@ -2833,13 +4620,15 @@ class State(object):
         self.typing_font = t_font
         self.app_list = app_list
         self.keyboard = keyboard
+        self.text_cache = text_cache
+        self.gui = gui
         self.recent_app_switcher = None
-        if gui is None:
-            self.gui = GUI()
         if colors is None:
-            self.color_palette = GUI.ColorPalette()
+            with BootProfile.phase("colors"):
+                self.color_palette = GUI.ColorPalette()
         if icons is None:
-            self.icons = GUI.Icons()
+            with BootProfile.phase("icons"):
+                self.icons = GUI.Icons()
         if controller is None:
             self.thread_controller = Controller()
         if event_queue is None:
@@ -2847,9 +4636,13 @@ class State(object):
         if notification_queue is None:
             self.notification_queue = NotificationQueue()
         if font is None:
-            self.font = GUI.Font()
+            with BootProfile.phase("fonts"):
+                self.font = GUI.Font()
         if t_font is None:
-            self.typing_font = GUI.Font("res/RobotoMono-Regular.ttf")
+            with BootProfile.phase("typing font"):
+                self.typing_font = GUI.Font("res/RobotoMono-Regular.ttf")
+        if text_cache is None:
+            self.text_cache = GUI.TextCache()
 
     def get_active_application(self):
         return self.active_application
@@ -2876,6 +4669,8 @@ class State(object):
         return self.typing_font
 
     def get_gui(self):
+        if self.gui is None:
+            self.gui = GUI()
         return self.gui
 
     def get_application_list(self):
@@ -2885,12 +4680,16 @@ class State(object):
 
     def get_function_bar(self):
         if self.function_bar is None:
-            self.function_bar = GUI.FunctionBar()
+            with BootProfile.phase("function bar"):
+                self.function_bar = GUI.FunctionBar()
         return self.function_bar
 
     def get_keyboard(self):
         return self.keyboard
 
+    def get_text_cache(self):
+        return self.text_cache
+
     def set_active_application(self, app):
         self.active_application = app
 
@@ -2927,6 +4726,9 @@ class State(object):
     def set_keyboard(self, keyboard):
         self.keyboard = keyboard
 
+    def set_text_cache(self, cache):
+        self.text_cache = cache
+
     @staticmethod
     def get_state():
         return state
@@ -3006,7 +4808,7 @@ class State(object):
                         return
 
     @staticmethod
-    def error_recovery(message="Unknown", data=None):
+    def error_recovery(message="Unknown", data=None, trace=None):
         print
         message
         screen.fill([200, 100, 100])
@@ -3024,7 +4826,7 @@ class State(object):
         txt += "\nAdditional Data:\n"
         txt += str(data)
         txt += "\n\nTraceback:\n"
-        txt += format_exc()
+        txt += format_exc() if trace is None else trace
         f.write(txt)
         f.close()
         screen.blit(sf.render("Traceback saved.", 1, (200, 200, 200)), [20, 80])
@@ -3054,30 +4856,70 @@ class State(object):
                         return
 
     @staticmethod
-    def main():
-        while True:
-            # Limit FPS
-            state.get_gui().timer.tick(state.get_gui().update_interval)
-            state.get_gui().monitor_fps()
-            # Update event queue
-            state.get_event_queue().check()
-            # Refresh main thread controller
-            state.get_thread_controller().run()
-            # Paint UI
-            if state.get_active_application() is not None:
-                try:
-                    state.get_active_application().ui.render()
-                except:
-                    State.error_recovery("UI error.", "FPS: " + str(state.get_gui().update_interval))
-                    Application.full_close_current()
-            state.get_function_bar().render()
-            if state.get_keyboard() is not None and state.get_keyboard().active:
-                state.get_keyboard().render(screen)
+    def boot():
+        # type: () -> State
+        """Creates the global state and activates the home app, recording each phase in the boot profile."""
+        global state
+        BootProfile.start()
+        state = State()
+        globals()["state"] = state
+        __builtin__.state = state
+        with BootProfile.phase("pygame.init"):
+            pygame.init()
+        # These do not need the display, so they load while its mode is set, which releases the GIL. Opening a font
+        # blocks until the mode is set, so the fonts load afterwards with the app imports.
+        loader = BootLoader()
+        loader.add_task("icon decoding", state.get_icons().preload)
+        loader.add_task("manifests", state.get_application_list)
+        loader.start()
+        state.get_gui()
+        if __import__("sys").platform == 'linux2':
+            pygame.mouse.set_visible(False)
+        loader.add_task("font files", lambda: state.get_font().preload(14, 18, 20))
+        loader.add_task("app imports", lambda: state.get_application_list().get_app("home").load(), ("manifests",))
+        with BootProfile.phase("boot loads"):
+            loader.run(state.get_gui().show_boot_progress)
+        # The tasks only print their own failures; apps that failed to load are reported now that the GUI is up.
+        state.get_application_list().report_load_errors()
+        with BootProfile.phase("home activation"):
+            state.get_application_list().get_app("home").activate()
+        return state
+
+    @staticmethod
+    def render_frame():
+        # type: () -> None
+        # Limit FPS
+        state.get_gui().timer.tick(state.get_gui().update_interval)
+        state.get_gui().monitor_fps()
+        # Update event queue
+        state.get_event_queue().check()
+        # Refresh main thread controller
+        state.get_thread_controller().run()
+        # Paint UI
+        if state.get_active_application() is not None:
+            try:
+                state.get_active_application().ui.render()
+            except:
+                State.error_recovery("UI error.", "FPS: " + str(state.get_gui().update_interval))
+                Application.full_close_current()
+        state.get_function_bar().render()
+        if state.get_keyboard() is not None and state.get_keyboard().active:
+            state.get_keyboard().render(screen)
 
-            if state.get_gui().update_interval <= 5:
-                pygame.draw.rect(screen, (255, 0, 0), [state.get_gui().width - 5, 0, 5, 5])
+        if state.get_gui().update_interval <= 5:
+            pygame.draw.rect(screen, (255, 0, 0), [state.get_gui().width - 5, 0, 5, 5])
 
-            state.get_gui().refresh()
+        state.get_gui().refresh()
+
+    @staticmethod
+    def main():
+        while True:
+            if BootProfile.recording:
+                with BootProfile.phase("first frame"):
+                    State.render_frame()
+                BootProfile.finish()
+            else:
+                State.render_frame()
             # Check Events
             latest_event = state.get_event_queue().get_latest_complete()
             if latest_event is not None:
@@ -3133,14 +4975,9 @@ class State(object):
 
 
 if __name__ == "__main__":
-    state = State()
-    globals()["state"] = state
-    __builtin__.state = state
+    State.boot()
     # TEST
     # State.state_shell()
-    if __import__("sys").platform == 'linux2':
-        pygame.mouse.set_visible(False)
-    state.get_application_list().get_app("home").activate()
     try:
         State.main()
     except:
@@ -0,0 +1,72 @@
+'''
+Benchmarks a cold boot, from importing pyos to the first frame on screen.
+
+Usage: python tools/benchmark_boot.py [runs]
+Each run boots Python OS in a fresh interpreter under the dummy SDL driver,
+renders one frame and reads back the boot timeline (the same one a normal
+boot writes to temp/boot_profile.json). Reports the median of every phase
+over all runs, 10 by default, and of the summed time of the boot tasks that
+ran on worker threads, to compare with the "boot loads" wall time.
+'''
+import os
+import sys
+import json
+import subprocess
+from timeit import default_timer
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def boot_once():
+    start = default_timer()
+    import pyos
+    import_time = round((default_timer() - start) * 1000, 3)
+    pyos.State.boot()
+    with pyos.BootProfile.phase("first frame"):
+        pyos.State.render_frame()
+    timeline = pyos.BootProfile.finish()
+    timeline["import"] = import_time
+    sys.stdout.write(json.dumps(timeline))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def run_boot():
+    child = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child"], stdout=subprocess.PIPE)
+    output = child.communicate()[0]
+    if child.returncode != 0:
+        raise RuntimeError("Boot failed with exit code " + str(child.returncode))
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) / 2
+    if len(values) % 2 == 1:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def main(runs):
+    timelines = [run_boot() for _ in range(runs)]
+    names = []
+    for phase in timelines[0]["phases"]:
+        if phase["name"] not in names:
+            names.append(phase["name"])
+    print "%d cold boots, median ms" % runs
+    print "%-24s %10.2f" % ("import pyos", median([timeline["import"] for timeline in timelines]))
+    for name in names:
+        print "%-24s %10.2f" % (name, median([sum(phase["ms"] for phase in timeline["phases"] if phase["name"] == name)
+                                              for timeline in timelines]))
+    print "%-24s %10.2f" % ("boot tasks, serial sum", median([
+        sum(phase["ms"] for phase in timeline["phases"] if phase["thread"] != "MainThread") for timeline in timelines]))
+    print "%-24s %10.2f" % ("total", median([timeline["total"] for timeline in timelines]))
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        boot_once()
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,76 @@
+'''
+Benchmarks icon loading through GUI.Icons with and without the icon atlases.
+
+Usage: python tools/benchmark_icons.py
+"Cold boot" loads every named system icon and every app icon into a fresh
+GUI.Icons. "Launcher rebuild" asks for each app icon twice into another
+fresh GUI.Icons, as the launcher does when it builds its list.
+Build the atlases first with tools/build_icon_atlas.py.
+'''
+import os
+import sys
+import json
+from timeit import default_timer
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame
+import pyos
+
+
+def get_app_icons():
+    app_icons = []
+    for location in sorted(pyos.Application.get_listings().keys()):
+        listing = open(os.path.join(location, "app.json"), "rU")
+        icon = json.loads(str(unicode(listing.read(), errors="ignore"))).get("more", {}).get("icon")
+        listing.close()
+        if icon is not None:
+            app_icons.append((str(icon), location))
+    return app_icons
+
+
+def new_icons(use_atlas):
+    icons = pyos.GUI.Icons()
+    if not use_atlas:
+        icons.atlases = []
+    return icons
+
+
+def cold_boot(use_atlas, app_icons):
+    start = default_timer()
+    icons = new_icons(use_atlas)
+    for name in icons.get_icons().keys():
+        icons.get_loaded_icon(name)
+    for icon, location in app_icons:
+        icons.get_loaded_icon(icon, location)
+    return default_timer() - start
+
+
+def launcher_rebuild(use_atlas, app_icons):
+    start = default_timer()
+    icons = new_icons(use_atlas)
+    for _ in range(2):
+        for icon, location in app_icons:
+            icons.get_loaded_icon(icon, location)
+    return default_timer() - start
+
+
+def best(method, *args):
+    return min(method(*args) for _ in range(20))
+
+
+def main():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1), 0, 32)
+    app_icons = get_app_icons()
+    print "%d named icons, %d app icons" % (len(pyos.GUI.Icons().get_icons()), len(app_icons))
+    print "Cold boot, files:          %8.2f ms" % (best(cold_boot, False, app_icons) * 1000)
+    print "Cold boot, atlas:          %8.2f ms" % (best(cold_boot, True, app_icons) * 1000)
+    print "Launcher rebuild, files:   %8.2f ms" % (best(launcher_rebuild, False, app_icons) * 1000)
+    print "Launcher rebuild, atlas:   %8.2f ms" % (best(launcher_rebuild, True, app_icons) * 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+'''
+Benchmarks typing into a GUI.TextEntryField and its effect on the shared text cache.
+
+Usage: python tools/benchmark_typing.py
+Types a 200 character line one key at a time, then redraws a set of labels
+that were cached before typing started and reports how many were evicted.
+Also compares pygame's own string rendering with a glyph atlas drawn by
+batched Surface.blits, the alternative considered for the monospace typing
+font, both for typing and for the state shell's output area.
+'''
+import os
+import sys
+from timeit import default_timer
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import __builtin__
+import pygame
+import pyos
+
+LINE = ("state.get_thread_controller().threads[0].get_future().result(1.5) " * 4)[:200]
+
+
+def type_line(field):
+    start = default_timer()
+    for char in LINE:
+        field.append_char(char)
+    return default_timer() - start
+
+
+def render_labels(font):
+    for i in range(300):
+        font.render("Label " + str(i), 14, (200, 200, 200))
+
+
+def build_atlas(font, color):
+    width = font.size("m")[0]
+    atlas = pygame.Surface((width * 95, font.get_linesize()), pygame.SRCALPHA)
+    atlas.fill((0, 0, 0, 0))
+    rects = []
+    for i in range(95):
+        atlas.blit(font.render(chr(32 + i), True, color), (i * width, 0), None, pygame.BLEND_RGBA_MAX)
+        rects.append(pygame.Rect(i * width, 0, width, atlas.get_height()))
+    return atlas, rects, width
+
+
+def atlas_line(atlas, rects, width, surface, text, y=0):
+    surface.blits([(atlas, (x * width, y), rects[ord(char) - 32], pygame.BLEND_RGBA_MAX)
+                   for x, char in enumerate(text)], False)
+
+
+def best(method, runs=20):
+    times = []
+    for _ in range(runs):
+        start = default_timer()
+        method()
+        times.append(default_timer() - start)
+    return min(times) * 1000
+
+
+def compare_atlas(state):
+    # Both sides draw into the same kind of surface with the same blend mode. The atlas draws a string with one
+    # batched Surface.blits call.
+    font = state.get_typing_font().get(16)
+    color = (200, 200, 200)
+    atlas, rects, width = build_atlas(font, color)
+    line_height = font.get_linesize()
+    columns = 240 / width
+
+    def field():
+        surface = pygame.Surface((240, 25), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        return surface
+
+    def type_render():
+        for i in range(1, len(LINE) + 1):
+            field().blit(font.render(LINE[max(0, i - columns):i], 1, color), (0, 0), None, pygame.BLEND_RGBA_MAX)
+
+    def type_atlas():
+        for i in range(1, len(LINE) + 1):
+            atlas_line(atlas, rects, width, field(), LINE[max(0, i - columns):i])
+
+    # The state shell's output area, showing the repr of the state as it does after "state.__dict__".
+    wrapper = pyos.GUI.TextWrapper.get(font)
+    lines = wrapper.wrap(str(state.__dict__), 240)[0]
+    area = (240, 295)
+
+    def shell_blended():
+        surface = pygame.Surface(area, pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        for number, (line, line_width) in enumerate(lines[:area[1] / line_height]):
+            surface.blit(font.render(line, 1, color), (0, number * line_height))
+
+    def shell_render():
+        pyos.GUI.MultiLineText.render_lines(lines, font, area, color, (0, 0, 0, 0), 0)
+
+    def shell_atlas():
+        surface = pygame.Surface(area, pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        for number, (line, line_width) in enumerate(lines[:area[1] / line_height]):
+            atlas_line(atlas, rects, width, surface, line, number * line_height)
+
+    print "200 keys, visible text, pygame render: %6.2f ms" % best(type_render)
+    print "200 keys, visible text, glyph atlas:   %6.2f ms" % best(type_atlas)
+    print "Shell output, alpha-blended lines:     %6.2f ms" % best(shell_blended, 200)
+    print "Shell output, MultiLineText lines:     %6.2f ms" % best(shell_render, 200)
+    print "Shell output, glyph atlas:             %6.2f ms" % best(shell_atlas, 200)
+
+
+def main():
+    pygame.display.init()
+    pygame.display.set_mode((240, 320), 0, 32)
+    pygame.font.init()
+    state = pyos.State()
+    pyos.state = state
+    __builtin__.state = state
+    cache = state.get_text_cache()
+    render_labels(state.get_font())
+    field = pyos.GUI.TextEntryField((0, 0), "", width=240, height=25)
+    elapsed = type_line(field)
+    evictions = cache.evictions
+    print "Typing 200 keys:             %8.1f ms" % (elapsed * 1000)
+    print "Cache evictions from typing: %8d" % evictions
+    hits = cache.hits
+    render_labels(state.get_font())
+    print "Labels still cached:         %8d of 300" % (cache.hits - hits)
+    compare_atlas(state)
+
+
+if __name__ == "__main__":
+    main()
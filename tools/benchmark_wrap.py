@@ -0,0 +1,99 @@
+'''
+Benchmarks GUI.MultiLineText word wrapping on 50 KB of text.
+
+Usage: python tools/benchmark_wrap.py [path-to-text-file]
+Without a path, the first 50 KB of the Python reference documentation bundled
+with the interpreter (pydoc_data.topics) is used, so the word widths cache
+sees the vocabulary of real prose. Also reports the paragraphs that wrap
+differently from the legacy measurement of each rendered line, which can
+differ from the summed word widths by a pixel of kerning or rounding.
+'''
+import os
+import sys
+from timeit import default_timer
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame
+import pyos
+
+
+def load_prose(size=51200):
+    from pydoc_data.topics import topics
+    return "".join(topics[name] for name in sorted(topics))[:size]
+
+
+def legacy_wrap(string, font, width):
+    final_lines = []
+    for requested_line in string.splitlines():
+        if font.size(requested_line)[0] > width:
+            accumulated_line = ""
+            for word in requested_line.split(" "):
+                test_line = accumulated_line + word + " "
+                if font.size(test_line)[0] < width:
+                    accumulated_line = test_line
+                else:
+                    final_lines.append(accumulated_line)
+                    accumulated_line = word + " "
+            final_lines.append(accumulated_line)
+        else:
+            final_lines.append(requested_line)
+    return final_lines
+
+
+def timed(method, *args):
+    start = default_timer()
+    result = method(*args)
+    return default_timer() - start, result
+
+
+def compare_breaks(text, font, width):
+    # Counts the wrapped paragraphs that break differently, and those that break earlier, than the legacy wrap.
+    wrapper = pyos.GUI.TextWrapper.get(font)
+    wrapped = differing = earlier = 0
+    for paragraph in text.splitlines():
+        legacy = [line.rstrip(" ") for line in legacy_wrap(paragraph, font, width)]
+        if len(legacy) < 2:
+            continue
+        lines = [line for line, line_width in wrapper.wrap(paragraph, width)[0]]
+        wrapped += 1
+        if lines != legacy:
+            differing += 1
+            if len(lines[0]) < len(legacy[0]) or len(lines) > len(legacy):
+                earlier += 1
+    return wrapped, differing, earlier
+
+
+def main():
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        f = open(path, "rU")
+        text = f.read()
+        f.close()
+    else:
+        path = "pydoc_data.topics"
+        text = load_prose()
+    pygame.font.init()
+    font = pygame.font.Font("res/RobotoCondensed-Regular.ttf", 14)
+    print "Text: " + path + " (" + str(len(text)) + " bytes)"
+    legacy_time, legacy_lines = timed(legacy_wrap, text, font, 220)
+    print "Legacy wrap at 220px:        %8.1f ms, %d lines" % (legacy_time * 1000, len(legacy_lines))
+    legacy_time, legacy_lines = timed(legacy_wrap, text, font, 300)
+    print "Legacy wrap at 300px:        %8.1f ms, %d lines" % (legacy_time * 1000, len(legacy_lines))
+    cold_time, (lines, too_long) = timed(pyos.GUI.TextWrapper.get(font).wrap, text, 220)
+    print "TextWrapper cold at 220px:   %8.1f ms, %d lines" % (cold_time * 1000, len(lines))
+    warm_time, (lines, too_long) = timed(pyos.GUI.TextWrapper.get(font).wrap, text, 300)
+    print "TextWrapper rewrap at 300px: %8.1f ms, %d lines" % (warm_time * 1000, len(lines))
+    wrapper = pyos.GUI.TextWrapper.get(font)
+    distinct = len(set(word for line in text.splitlines() for word in line.split(" ")))
+    print "Cached words: %d of %d distinct, %d evicted" % (wrapper.get_word_count(), distinct, wrapper.evictions)
+    for width in (220, 300):
+        wrapped, differing, earlier = compare_breaks(text, font, width)
+        print "Breaks at %dpx: %d of %d wrapped paragraphs differ from legacy, %d break earlier" % (
+            width, differing, wrapped, earlier)
+
+
+if __name__ == "__main__":
+    main()
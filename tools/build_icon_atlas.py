@@ -0,0 +1,54 @@
+'''
+Packs the system icons and the icons of installed apps into texture atlases.
+
+Usage: python tools/build_icon_atlas.py
+Writes res/icons/atlas/system.atlas and .json from every PNG in res/icons, and
+res/icons/atlas/apps.atlas and .json from app icons stored outside res/icons.
+GUI.Icons hands out subsurfaces of these instead of decoding each file.
+Rerun after changing an icon; entries whose file changed are ignored.
+'''
+import os
+import sys
+import json
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame
+import pyos
+
+
+def main():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1), 0, 32)
+    icons = pyos.GUI.Icons()
+    entries = {}
+    for name in sorted(os.listdir(icons.root_path)):
+        path = os.path.normpath(os.path.join(icons.root_path, name))
+        if name.lower().endswith(".png") and os.path.isfile(path):
+            entries[path] = (pygame.image.load(path), pyos.GUI.Icons.get_file_entry(path))
+    pyos.GUI.Icons.write_atlas(os.path.join(icons.atlas_path, "system"), entries)
+    print "System atlas: " + str(len(entries)) + " icons"
+    app_icons = []
+    for location in sorted(pyos.Application.get_listings().keys()):
+        listing = open(os.path.join(location, "app.json"), "rU")
+        icon = json.loads(str(unicode(listing.read(), errors="ignore"))).get("more", {}).get("icon")
+        listing.close()
+        if icon is None:
+            continue
+        resolved = icons.resolve_icon(str(icon), location)
+        if resolved is not None and not resolved[0].startswith(os.path.normpath(icons.root_path) + os.sep):
+            app_icons.append(resolved)
+    entries = {}
+    for path, size in app_icons:
+        surface = pygame.image.load(path)
+        if size != ():
+            surface = pygame.transform.scale(surface, size)
+        entries[os.path.normpath(path)] = (surface, pyos.GUI.Icons.get_file_entry(path, size))
+    pyos.GUI.Icons.write_atlas(os.path.join(icons.atlas_path, "apps"), entries)
+    print "App atlas: " + str(len(entries)) + " icons"
+
+
+if __name__ == "__main__":
+    main()